@@ -2,30 +2,174 @@
 
 from __future__ import annotations
 
+import logging
+import math
 import os
+import statistics
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from fastapi import Depends, Request
 from fastapi.responses import RedirectResponse
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
 
-from api.services.models import AdminUser, SessionLocal, init_admin_db
+from api.services.models import AdminUser, SessionLocal, get_session, init_admin_db
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AdminSettings:
+    admin_password: str = "admin123"  # 默认管理员密码（仅在无任何管理员时使用）
+    argon2_time_cost: Optional[int] = None  # 固定 argon2 time_cost；为空时启动时自动校准
+
+
+def _load_admin_settings() -> AdminSettings:
+    """从环境变量 ADMIN_PASSWORD、ADMIN_ARGON2_TIME_COST 读取，进程内只读一次。"""
+    time_cost = os.environ.get("ADMIN_ARGON2_TIME_COST")
+    return AdminSettings(
+        admin_password=os.environ.get("ADMIN_PASSWORD", "admin123"),
+        argon2_time_cost=int(time_cost) if time_cost else None,
+    )
+
+
+ADMIN_SETTINGS = _load_admin_settings()
 
 
 class AdminLoginRequired(Exception):
     """未登录时由依赖抛出，由 exception_handler 转为 303 重定向。"""
+
     def __init__(self, url: str = "/admin/login"):
         self.url = url
         super().__init__(url)
 
 
-# 使用 pbkdf2_sha256，无密码长度限制，passlib 内置无需 bcrypt 依赖
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# 新哈希使用 argon2id（C 实现，内存困难，无 bcrypt 的 72 字节长度限制），成本按约 100~250ms/次的交互预算设定；
+# argon2 哈希直接走 argon2-cffi，省去 passlib 的方案分发与格式解析
+_ARGON2_MEMORY_COST = 65536
+_ARGON2_TIME_COST = 3
+_ARGON2_PARALLELISM = 4
+_argon2 = PasswordHasher(
+    time_cost=_ARGON2_TIME_COST,
+    memory_cost=_ARGON2_MEMORY_COST,
+    parallelism=_ARGON2_PARALLELISM,
+)
+
+# 仅用于校验旧的 pbkdf2_sha256 哈希；deprecated="auto" 使其在登录成功时自动升级为 argon2
+pwd_context = CryptContext(
+    schemes=["argon2", "pbkdf2_sha256"],
+    deprecated="auto",
+    argon2__memory_cost=_ARGON2_MEMORY_COST,
+    argon2__time_cost=_ARGON2_TIME_COST,
+    argon2__parallelism=_ARGON2_PARALLELISM,
+)
+
+
+def _hash_password(password: str) -> str:
+    return _argon2.hash(password)
+
+
+def _verify_and_update(password: str, stored_hash: str) -> tuple[bool, Optional[str]]:
+    """校验密码，返回 (是否匹配, 需要升级时的新哈希或 None)。"""
+    if stored_hash.startswith("$argon2"):
+        try:
+            _argon2.verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False, None
+        return True, (_argon2.hash(password) if _argon2.check_needs_rehash(stored_hash) else None)
+    return pwd_context.verify_and_update(password, stored_hash)
+
 
+# 用户名不存在时也对其做一次等价成本的校验，避免通过响应时间枚举用户名
+_DUMMY_HASH = _hash_password("invalid")
 
-def _get_db():
-    init_admin_db()
+# 启动时校准 argon2 time_cost 的目标耗时与上限
+_HASH_TARGET_SECONDS = 0.25
+_ARGON2_MAX_TIME_COST = 16
+
+
+def _set_argon2_time_cost(time_cost: int) -> None:
+    global _argon2, _DUMMY_HASH
+    _argon2 = PasswordHasher(
+        time_cost=time_cost,
+        memory_cost=_ARGON2_MEMORY_COST,
+        parallelism=_ARGON2_PARALLELISM,
+    )
+    pwd_context.update(argon2__time_cost=time_cost)
+    _DUMMY_HASH = _hash_password("invalid")
+    _default_admin_hash.cache_clear()
+
+
+def calibrate_password_hashing() -> int:
+    """
+    按本机性能确定 argon2 time_cost，使单次哈希约 _HASH_TARGET_SECONDS 秒；返回最终取值。
+    环境变量 ADMIN_ARGON2_TIME_COST 优先（便于多实例、重启间保持一致）。
+    旧参数的哈希仍可校验，并在登录成功时按新参数重新哈希。
+    """
+    if ADMIN_SETTINGS.argon2_time_cost:
+        time_cost = ADMIN_SETTINGS.argon2_time_cost
+    else:
+        # argon2 耗时与 time_cost 近似线性：测单轮耗时后外推，避免逐级试算拖慢启动
+        one_pass = PasswordHasher(time_cost=1, memory_cost=_ARGON2_MEMORY_COST, parallelism=_ARGON2_PARALLELISM)
+        samples = []
+        for _ in range(3):
+            start = time.perf_counter()
+            one_pass.hash("calibration")
+            samples.append(time.perf_counter() - start)
+        per_pass = max(statistics.median(samples), 1e-6)
+        time_cost = math.ceil(_HASH_TARGET_SECONDS / per_pass)
+        time_cost = min(max(time_cost, _ARGON2_TIME_COST), _ARGON2_MAX_TIME_COST)
+        logger.info(
+            "argon2 time_cost calibrated to %d (%.0f ms/pass); set ADMIN_ARGON2_TIME_COST=%d to pin it",
+            time_cost, per_pass * 1000, time_cost,
+        )
+    if time_cost != _argon2.time_cost:
+        _set_argon2_time_cost(time_cost)
+    return time_cost
+
+
+# 建表与默认管理员只需在进程内成功执行一次，之后的请求直接跳过
+_admin_bootstrapped = False
+_admin_bootstrap_lock = threading.Lock()
+
+
+def bootstrap_admin() -> None:
+    """初始化 admin.db 并确保存在默认管理员；进程内仅首次调用真正执行。"""
+    global _admin_bootstrapped
+    if _admin_bootstrapped:
+        return
+    with _admin_bootstrap_lock:
+        if _admin_bootstrapped:
+            return
+        init_admin_db()
+        db = SessionLocal()
+        try:
+            _ensure_default_admin(db)
+        finally:
+            db.close()
+        _admin_bootstrapped = True
+
+
+# 每请求一个 Session；建表与默认管理员已在应用启动（lifespan）时由 bootstrap_admin 完成
+_get_db = get_session
+
+
+def _get_bootstrapped_db():
+    """登录页专用：先确保建表与默认管理员存在（进程内仅首次实际执行），再提供 Session。"""
+    bootstrap_admin()
     db = SessionLocal()
     try:
         yield db
@@ -33,35 +177,135 @@ def _get_db():
         db.close()
 
 
+@lru_cache(maxsize=1)
+def _default_admin_hash() -> str:
+    """默认管理员密码的哈希，进程内只计算一次（库被重置时无需重复计算）。"""
+    return _hash_password(ADMIN_SETTINGS.admin_password)
+
+
 def _ensure_default_admin(db: Session) -> None:
     """若不存在任何管理员，则创建默认 admin（密码来自环境变量 ADMIN_PASSWORD，默认 admin123）。"""
     if db.query(AdminUser).first():
         return
-    password = os.environ.get("ADMIN_PASSWORD", "admin123")
     admin = AdminUser(
         username="admin",
-        password_hash=pwd_context.hash(password),
+        password_hash=_default_admin_hash(),
     )
     db.add(admin)
     db.commit()
 
 
-def verify_admin(username: str, password: str, db: Session) -> Optional[AdminUser]:
-    admin = db.query(AdminUser).filter(AdminUser.username == username).first()
-    if not admin:
-        return None
-    if not pwd_context.verify(password, admin.password_hash):
+def _select_admin_credentials(username: str, db: Session) -> Optional[Row]:
+    return db.execute(
+        select(AdminUser.id, AdminUser.username, AdminUser.password_hash).where(AdminUser.username == username)
+    ).first()
+
+
+def _finish_verify(admin: Optional[Row], ok: bool, new_hash: Optional[str], db: Session) -> Optional[Row]:
+    if admin is None or not ok:
         return None
+    if new_hash:
+        db.get(AdminUser, admin.id).password_hash = new_hash
+        db.commit()
     return admin
 
 
+def verify_admin(username: str, password: str, db: Session) -> Optional[Row]:
+    """
+    校验用户名与密码，成功返回 (id, username, password_hash) 行，失败返回 None。
+    仅按列查询，不构造 ORM 对象；只有需要升级哈希时才加载 AdminUser。
+    """
+    admin = _select_admin_credentials(username, db)
+    if admin is None:
+        _verify_and_update(password, _DUMMY_HASH)
+        return None
+    ok, new_hash = _verify_and_update(password, admin.password_hash)
+    return _finish_verify(admin, ok, new_hash, db)
+
+
+async def verify_admin_async(username: str, password: str, db: Session) -> Optional[Row]:
+    """verify_admin 的异步版本：哈希校验放到线程池执行，不阻塞事件循环。"""
+    admin = _select_admin_credentials(username, db)
+    stored_hash = admin.password_hash if admin is not None else _DUMMY_HASH
+    ok, new_hash = await run_in_threadpool(_verify_and_update, password, stored_hash)
+    return _finish_verify(admin, ok, new_hash, db)
+
+
 def set_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _hash_password(password)
+
+
+# 当前请求的已登录管理员用户名，由 AdminSessionMiddleware 写入；不持有 Request 的代码（如日志 filter）也可读取
+_current_admin: ContextVar[Optional[str]] = ContextVar("_current_admin", default=None)
+
+ADMIN_COOKIE_NAME = "admin_token"
+ADMIN_COOKIE_PATH = "/admin"
+
+
+class AdminSessionMiddleware:
+    """
+    纯 ASGI 中间件：管理后台登录态只有 admin_username，用 itsdangerous 签名的单值 cookie 保存，
+    替代 Starlette SessionMiddleware（整包 JSON session 每请求解码、重新编码）。
+    - 请求进入时校验一次 cookie，结果放入 request.state.admin_username 与 ContextVar；
+    - 路由通过修改 request.state.admin_username 登录/登出，仅在值变化时回写 Set-Cookie。
+    """
+
+    def __init__(self, app, secret_key: str, max_age: int = 14 * 24 * 60 * 60):
+        self.app = app
+        self.serializer = URLSafeTimedSerializer(secret_key, salt="dbskill-admin-session")
+        self.max_age = max_age
+
+    def _load_username(self, scope) -> Optional[str]:
+        token = HTTPConnection(scope).cookies.get(ADMIN_COOKIE_NAME)
+        if not token:
+            return None
+        try:
+            username = self.serializer.loads(token, max_age=self.max_age)
+        except BadSignature:
+            return None
+        return username if isinstance(username, str) else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        username = self._load_username(scope)
+        state = scope.setdefault("state", {})
+        state["admin_username"] = username
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                current = state.get("admin_username")
+                if current != username:
+                    headers = MutableHeaders(scope=message)
+                    flags = f"path={ADMIN_COOKIE_PATH}; httponly; samesite=lax"
+                    if current:
+                        value = self.serializer.dumps(current)
+                        headers.append("Set-Cookie", f"{ADMIN_COOKIE_NAME}={value}; Max-Age={self.max_age}; {flags}")
+                    else:
+                        headers.append("Set-Cookie", f"{ADMIN_COOKIE_NAME}=; expires=Thu, 01 Jan 1970 00:00:00 GMT; {flags}")
+            await send(message)
+
+        token = _current_admin.set(username)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_admin.reset(token)
+
+
+def login_admin(request: Request, username: str) -> None:
+    """登录：由 AdminSessionMiddleware 在响应时写入签名 cookie。"""
+    request.state.admin_username = username
+
+
+def logout_admin(request: Request) -> None:
+    """登出：由 AdminSessionMiddleware 在响应时清除 cookie。"""
+    request.state.admin_username = None
 
 
 def require_admin(request: Request) -> Optional[str]:
-    """从 session 中获取已登录的 admin 用户名，未登录返回 None。"""
-    return request.session.get("admin_username")
+    """获取已登录的 admin 用户名（AdminSessionMiddleware 已在请求进入时解析），未登录返回 None。"""
+    return getattr(request.state, "admin_username", None)
 
 
 def get_admin_username(request: Request) -> str:
@@ -70,3 +314,32 @@ def get_admin_username(request: Request) -> str:
     if not username:
         raise AdminLoginRequired("/admin/login")
     return username
+
+
+# 已登录管理员 username -> (过期时间, id) 的短期缓存，管理页鉴权时免去按用户名查库
+_ADMIN_ID_CACHE_TTL = 60.0
+_admin_id_cache: dict[str, tuple[float, int]] = {}
+_admin_id_cache_lock = threading.Lock()
+
+
+def get_admin_user_id(username: str = Depends(get_admin_username)) -> Optional[int]:
+    """
+    依赖：返回当前登录管理员的 id（账号已不存在时为 None），结果缓存 _ADMIN_ID_CACHE_TTL 秒。
+    只在缓存未命中时才创建 Session，命中时不产生任何会话开销。
+    """
+    now = time.monotonic()
+    cached = _admin_id_cache.get(username)
+    if cached and cached[0] > now:
+        return cached[1]
+    with SessionLocal() as db:
+        admin_id = db.scalar(select(AdminUser.id).where(AdminUser.username == username))
+    if admin_id is not None:
+        with _admin_id_cache_lock:
+            _admin_id_cache[username] = (now + _ADMIN_ID_CACHE_TTL, admin_id)
+    return admin_id
+
+
+def invalidate_admin_cache(username: str) -> None:
+    """管理员账号变更（如修改密码）后调用，清除其缓存。"""
+    with _admin_id_cache_lock:
+        _admin_id_cache.pop(username, None)
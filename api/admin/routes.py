@@ -1,40 +1,79 @@
 from __future__ import annotations
 
+import base64
 import hashlib
-import secrets
+import os
+import time
+from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Form, Query, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, Template
 from pydantic import BaseModel
-from sqlalchemy import text
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+from starlette.concurrency import run_in_threadpool
 
 from api.admin.auth import (
-    _ensure_default_admin,
+    _get_bootstrapped_db,
+    _get_db,
+    bootstrap_admin,
+    get_admin_user_id,
     get_admin_username,
+    invalidate_admin_cache,
+    login_admin,
+    logout_admin,
     require_admin,
     set_password_hash,
     verify_admin,
+    verify_admin_async,
 )
+from api.auth import hash_api_key, invalidate_api_key_cache
 from api.services.audit import list_audit_logs
-from api.services.models import ADMIN_DB_PATH, ApiKey, ApiKeyDatabase, AdminUser, Database, SessionLocal, init_admin_db
-from dbskill.constants import DEFAULT_PORTS, SUPPORTED_DB_TYPES
-from dbskill.utils import DatabaseConfig, create_sqlalchemy_engine
+from api.services.models import ADMIN_DB_PATH, ApiKey, ApiKeyDatabase, AdminUser, AsyncSessionLocal, Database, make_key_hint, mask_key_hint
+from dbskill.constants import DEFAULT_PORTS, SUPPORTED_DB_TYPE_SET
+from dbskill.utils import DatabaseConfig, create_sqlalchemy_engine, discard_sqlalchemy_engine
 
 
-router = APIRouter(prefix="/admin", tags=["admin"])
+# 管理端 JSON 接口（测试连接、Key 列表）只返回小而简单的字典，统一交给 orjson 序列化
+router = APIRouter(prefix="/admin", tags=["admin"], default_response_class=ORJSONResponse)
 
 templates = Jinja2Templates(directory=str(__file__).replace("routes.py", "templates"))
-
-
-def get_db():
-    init_admin_db()
-    db = SessionLocal()
-    try:
+# 模板不在运行时修改：关闭 mtime 检查，编译结果写入字节码缓存，重启后免去重新编译
+templates.env.auto_reload = False
+# 不指定目录：Jinja 使用按用户区分、权限 0700 并校验属主的临时目录，其他本地用户无法预置字节码
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+templates.env.filters["mask_key"] = mask_key_hint
+
+_T_API_KEY_DETAIL = templates.get_template("admin_api_key_detail.html")
+_T_API_KEY_NEW = templates.get_template("admin_api_key_new.html")
+_T_API_KEYS = templates.get_template("admin_api_keys.html")
+_T_AUDIT_LOGS = templates.get_template("admin_audit_logs.html")
+_T_CHANGE_PASSWORD = templates.get_template("admin_change_password.html")
+_T_DASHBOARD = templates.get_template("admin_dashboard.html")
+_T_DATABASE_DETAIL = templates.get_template("admin_database_detail.html")
+_T_DATABASE_EDIT = templates.get_template("admin_database_edit.html")
+_T_DATABASE_NEW = templates.get_template("admin_database_new.html")
+_T_DATABASES = templates.get_template("admin_databases.html")
+_T_LOGIN = templates.get_template("admin_login.html")
+
+
+def _render(template: Template, context: dict, status_code: int = 200, etag: Optional[str] = None) -> HTMLResponse:
+    """直接渲染预加载的模板对象，省去按名称查找模板；传入 etag 时附带协商缓存响应头。"""
+    response = HTMLResponse(template.render(context), status_code=status_code)
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+async def get_db():
+    # 建表/迁移与默认管理员由应用 lifespan 中的 bootstrap_admin() 完成，这里只提供会话
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 class ApiKeyOut(BaseModel):
@@ -44,8 +83,11 @@ class ApiKeyOut(BaseModel):
 
 
 @router.get("/api-keys", response_model=List[ApiKeyOut])
-def list_api_keys(db=Depends(get_db)):
-    keys = db.query(ApiKey).all()
+async def list_api_keys(
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(get_admin_username),
+):
+    keys = (await db.scalars(select(ApiKey))).all()
     return [
         ApiKeyOut(prefix=k.prefix, name=k.name, permission_level=k.permission_level)
         for k in keys
@@ -112,7 +154,6 @@ I18N = {
         "prev_page": "Previous",
         "next_page": "Next",
         "page_x_of_y": "Page {page} of {total}",
-        "click_to_toggle": "Click to toggle show/hide",
         "edit_key": "Edit",
         "regenerate_key": "Regenerate Key",
         "disable": "Disable",
@@ -207,7 +248,6 @@ I18N = {
         "prev_page": "上一页",
         "next_page": "下一页",
         "page_x_of_y": "第 {page} 页，共 {total} 页",
-        "click_to_toggle": "点击切换显示/隐藏",
         "edit_key": "编辑",
         "regenerate_key": "重新生成 Key",
         "disable": "禁用",
@@ -248,57 +288,180 @@ I18N = {
 }
 
 
+# 语言集合与各语言的模板上下文骨架在模块加载时构建一次，处理函数只做浅合并
+_LANGS = frozenset(I18N)
+_BASE_CTX = {lang: {"t": I18N[lang], "lang": lang} for lang in I18N}
+
+
 def _get_lang(request: Request) -> str:
     lang = request.query_params.get("lang", "en")
-    return lang if lang in I18N else "en"
+    return lang if lang in _LANGS else "en"
+
+
+# 写操作结束后的重定向地址按语言预先拼好，处理函数只需查表并填入 id
+_KEY_LIST_URL = {lang: f"/admin/ui/api-keys?lang={lang}" for lang in I18N}
+_KEY_DETAIL_URL = {lang: f"/admin/ui/api-keys/{{}}?lang={lang}" for lang in I18N}
+_DATABASE_LIST_URL = {lang: f"/admin/ui/databases?lang={lang}" for lang in I18N}
+_DATABASE_DETAIL_URL = {lang: f"/admin/ui/databases/{{}}?lang={lang}" for lang in I18N}
+
+
+# 列表/详情模板会遍历关联及其对端对象，统一用 selectin 预加载，避免逐行懒加载
+# 对端对象只取模板展示用到的列（不取 key_hash、password 等）
+_DATABASE_ASSIGNMENTS = (
+    selectinload(Database.key_assignments)
+    .selectinload(ApiKeyDatabase.api_key)
+    .load_only(ApiKey.id, ApiKey.name, ApiKey.key_hint)
+)
+_API_KEY_ASSIGNMENTS = (
+    selectinload(ApiKey.assignments)
+    .selectinload(ApiKeyDatabase.database)
+    .load_only(Database.id, Database.alias)
+)
+# 列表页走 Core 查询，只取表格展示的列，得到普通 Row 而非 ORM 实例（无 identity map、无懒加载）
+_DATABASE_LIST_COLUMNS = (Database.id, Database.alias, Database.type, Database.host)
+_API_KEY_LIST_COLUMNS = (ApiKey.id, ApiKey.name, ApiKey.key_hint, ApiKey.enabled)
+
+
+async def _paginate(db: AsyncSession, model, columns, page: int, per_page: int):
+    """按 id 倒序分页查询指定列；总数通过 COUNT(*) OVER () 随当前页一并返回，只需一次查询。"""
+    result = await db.execute(
+        select(*columns, func.count().over().label("total"))
+        .order_by(model.id.desc())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+    )
+    rows = result.all()
+    if rows:
+        return rows, rows[0].total
+    # 页码越界时当前页为空，总数需单独统计
+    total = await db.scalar(select(func.count()).select_from(model)) if page > 1 else 0
+    return [], total
+
+
+# 仪表盘计数缓存：(过期时间, 数据库数, API Key 数)；后台写入时由 _admin_data_changed 清空
+_DASHBOARD_COUNTS_TTL = 30.0
+_dashboard_counts_cache: Optional[tuple[float, int, int]] = None
+
+
+async def _dashboard_counts(db: AsyncSession) -> tuple[int, int]:
+    global _dashboard_counts_cache
+    cached = _dashboard_counts_cache
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1], cached[2]
+    row = (
+        await db.execute(
+            select(
+                select(func.count(Database.id)).scalar_subquery(),
+                select(func.count(ApiKey.id)).scalar_subquery(),
+            )
+        )
+    ).one()
+    _dashboard_counts_cache = (time.monotonic() + _DASHBOARD_COUNTS_TTL, row[0], row[1])
+    return row[0], row[1]
+
+
+# 审计日志页筛选下拉框选项缓存：(过期时间, 库别名行, Key 行)；后台写入时由 _admin_data_changed 清空
+_AUDIT_FILTERS_TTL = 30.0
+_audit_filters_cache: Optional[tuple[float, list, list]] = None
+
+
+async def _audit_filter_options(db: AsyncSession) -> tuple[list, list]:
+    """只取下拉框需要的列：库别名；Key 的 name 与展示前缀。"""
+    global _audit_filters_cache
+    cached = _audit_filters_cache
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1], cached[2]
+    databases = (await db.execute(select(Database.alias).order_by(Database.alias))).all()
+    api_keys = (
+        await db.execute(
+            select(ApiKey.name, func.substr(ApiKey.key_hint, 1, 8).label("prefix")).order_by(ApiKey.id)
+        )
+    ).all()
+    _audit_filters_cache = (time.monotonic() + _AUDIT_FILTERS_TTL, databases, api_keys)
+    return databases, api_keys
+
+
+# 页面 ETag：进程启动标识 + 写入版本号 + 时间段 + 登录用户 + 完整 URL。
+# 版本号只在本进程内递增，多 worker 部署时其他进程的写入最迟在一个时间段后体现（与上面缓存的 TTL 一致）
+_BOOT_ID = os.urandom(8).hex()
+_ETAG_BUCKET_SECONDS = 30
+_content_version = 0
+
+
+def _admin_data_changed() -> None:
+    """后台数据有写入：清空仪表盘计数与筛选项缓存，推进页面版本号使 ETag 失效。"""
+    global _dashboard_counts_cache, _audit_filters_cache, _content_version
+    _dashboard_counts_cache = None
+    _audit_filters_cache = None
+    _content_version += 1
+
+
+def _page_etag(request: Request) -> str:
+    bucket = int(time.time() // _ETAG_BUCKET_SECONDS)
+    admin = getattr(request.state, "admin_username", None) or ""
+    raw = f"{_BOOT_ID}-{_content_version}-{bucket}-{admin}-{request.url.path}?{request.url.query}"
+    return '"' + hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest() + '"'
+
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    """客户端缓存的版本仍是最新时返回 304，调用方直接返回它，跳过查询与渲染。"""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return None
+
+
+async def _group_by_first(db: AsyncSession, stmt) -> dict:
+    """执行查询并按第一列分组：{第一列值: [行, ...]}，用于列表页一次取回当前页全部关联。"""
+    grouped: dict = {}
+    for row in (await db.execute(stmt)).all():
+        grouped.setdefault(row[0], []).append(row)
+    return grouped
 
 
 # ---- 登录 / 登出 / 修改密码 ----
 
 @router.get("/login", response_class=HTMLResponse)
-def admin_login_page(request: Request, db=Depends(get_db)):
-    _ensure_default_admin(db)
+def admin_login_page(request: Request, _: None = Depends(bootstrap_admin)):
     if require_admin(request):
         return RedirectResponse(url="/admin/ui", status_code=303)
     lang = _get_lang(request)
-    return templates.TemplateResponse("admin_login.html", {"request": request, "t": I18N[lang], "lang": lang})
+    return _render(_T_LOGIN, {**_BASE_CTX[lang], "request": request})
 
 
 @router.post("/login", response_class=HTMLResponse)
-def admin_login_submit(
+async def admin_login_submit(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db=Depends(get_db),
+    db=Depends(_get_bootstrapped_db),
 ):
-    admin = verify_admin(username, password, db)
+    admin = await verify_admin_async(username, password, db)
     if not admin:
         lang = _get_lang(request)
-        return templates.TemplateResponse(
-            "admin_login.html",
-            {"request": request, "t": I18N[lang], "lang": lang, "error": I18N[lang]["invalid_credentials"]},
+        return _render(
+            _T_LOGIN,
+            {**_BASE_CTX[lang], "request": request, "error": I18N[lang]["invalid_credentials"]},
             status_code=401,
         )
-    request.session["admin_username"] = admin.username
+    login_admin(request, admin.username)
     return RedirectResponse(url="/admin/ui", status_code=303)
 
 
 @router.post("/logout", response_class=HTMLResponse)
 def admin_logout(request: Request):
-    request.session.clear()
+    logout_admin(request)
     return RedirectResponse(url="/admin/login", status_code=303)
 
 
 @router.get("/ui/change-password", response_class=HTMLResponse)
-def admin_change_password_form(
+async def admin_change_password_form(
     request: Request,
     _: str = Depends(get_admin_username),
-    db=Depends(get_db),
 ):
     lang = _get_lang(request)
-    return templates.TemplateResponse(
-        "admin_change_password.html",
-        {"request": request, "t": I18N[lang], "lang": lang, "active_section": "dashboard"},
+    return _render(
+        _T_CHANGE_PASSWORD,
+        {**_BASE_CTX[lang], "request": request, "active_section": "dashboard"},
     )
 
 
@@ -308,76 +471,92 @@ def admin_change_password_submit(
     old_password: str = Form(...),
     new_password: str = Form(...),
     admin_username: str = Depends(get_admin_username),
-    db=Depends(get_db),
+    admin_id: Optional[int] = Depends(get_admin_user_id),
+    db=Depends(_get_db),
 ):
-    admin = db.query(AdminUser).filter(AdminUser.username == admin_username).first()
+    # 密码校验/哈希为 CPU 密集操作，本路由保持同步并在线程池中使用同步会话
+    admin = db.get(AdminUser, admin_id) if admin_id is not None else None
     if not admin or not verify_admin(admin_username, old_password, db):
         lang = _get_lang(request)
-        return templates.TemplateResponse(
-            "admin_change_password.html",
-            {"request": request, "t": I18N[lang], "lang": lang, "active_section": "dashboard", "error": I18N[lang]["invalid_credentials"]},
+        return _render(
+            _T_CHANGE_PASSWORD,
+            {**_BASE_CTX[lang], "request": request, "active_section": "dashboard", "error": I18N[lang]["invalid_credentials"]},
             status_code=400,
         )
     admin.password_hash = set_password_hash(new_password)
     db.commit()
+    invalidate_admin_cache(admin_username)
     lang = _get_lang(request)
-    return templates.TemplateResponse(
-        "admin_change_password.html",
-        {"request": request, "t": I18N[lang], "lang": lang, "active_section": "dashboard", "success": I18N[lang]["password_changed"]},
+    return _render(
+        _T_CHANGE_PASSWORD,
+        {**_BASE_CTX[lang], "request": request, "active_section": "dashboard", "success": I18N[lang]["password_changed"]},
     )
 
 
 @router.get("/ui", response_class=HTMLResponse)
-def admin_ui_dashboard(request: Request, db=Depends(get_db), _: str = Depends(get_admin_username)):
+async def admin_ui_dashboard(request: Request, db: AsyncSession = Depends(get_db), _: str = Depends(get_admin_username)):
+    etag = _page_etag(request)
+    if (not_modified := _not_modified(request, etag)) is not None:
+        return not_modified
     lang = _get_lang(request)
-    databases = db.query(Database).all()
-    keys = db.query(ApiKey).all()
-    return templates.TemplateResponse(
-        "admin_dashboard.html",
+    databases_count, api_keys_count = await _dashboard_counts(db)
+    return _render(
+        _T_DASHBOARD,
         {
+            **_BASE_CTX[lang],
             "request": request,
-            "t": I18N[lang],
-            "lang": lang,
             "active_section": "dashboard",
-            "databases_count": len(databases),
-            "api_keys_count": len(keys),
+            "databases_count": databases_count,
+            "api_keys_count": api_keys_count,
         },
+        etag=etag,
     )
 
 
 @router.get("/ui/databases", response_class=HTMLResponse)
-def admin_ui_databases(
+async def admin_ui_databases(
     request: Request,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
+    etag = _page_etag(request)
+    if (not_modified := _not_modified(request, etag)) is not None:
+        return not_modified
     lang = _get_lang(request)
-    total = db.query(Database).count()
-    offset = (page - 1) * per_page
-    databases = db.query(Database).order_by(Database.id.desc()).offset(offset).limit(per_page).all()
-    for d in databases:
-        _ = list(d.key_assignments)
+    databases, total = await _paginate(db, Database, _DATABASE_LIST_COLUMNS, page, per_page)
+    assignments = await _group_by_first(
+        db,
+        select(
+            ApiKeyDatabase.database_id,
+            ApiKeyDatabase.permission_level,
+            ApiKey.name,
+            func.substr(ApiKey.key_hint, 1, 8).label("prefix"),
+        )
+        .join(ApiKey, ApiKey.id == ApiKeyDatabase.api_key_id)
+        .where(ApiKeyDatabase.database_id.in_([d.id for d in databases])),
+    )
     total_pages = (total + per_page - 1) // per_page if total > 0 else 1
-    return templates.TemplateResponse(
-        "admin_databases.html",
+    return _render(
+        _T_DATABASES,
         {
+            **_BASE_CTX[lang],
             "request": request,
-            "t": I18N[lang],
-            "lang": lang,
             "active_section": "databases",
             "databases": databases,
+            "assignments": assignments,
             "page": page,
             "per_page": per_page,
             "total": total,
             "total_pages": total_pages,
         },
+        etag=etag,
     )
 
 
 @router.get("/ui/audit-logs", response_class=HTMLResponse)
-def admin_ui_audit_logs(
+async def admin_ui_audit_logs(
     request: Request,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
@@ -385,11 +564,22 @@ def admin_ui_audit_logs(
     api_key: Optional[str] = Query(None, alias="api_key"),
     date_from: Optional[str] = Query(None),
     date_to: Optional[str] = Query(None),
-    db=Depends(get_db),
+    cursor_ts: Optional[str] = Query(None),
+    cursor_id: Optional[int] = Query(None),
+    total: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
     lang = _get_lang(request)
-    entries_page, total = list_audit_logs(
+    # “下一页”链接带上上一页末行的 (ts, id) 与已知总数，走键集翻页且不再 COUNT；
+    # cursor 缺失或无法解析时退回按页码 OFFSET
+    cursor = None
+    if cursor_ts and cursor_id is not None and page > 1:
+        try:
+            cursor = (datetime.fromisoformat(cursor_ts), cursor_id)
+        except ValueError:
+            cursor = None
+    entries_page, counted, next_cursor = await list_audit_logs(
         db_session=db,
         db_alias=db_alias,
         api_key_name=api_key,
@@ -397,22 +587,26 @@ def admin_ui_audit_logs(
         date_to=date_to,
         page=page,
         per_page=per_page,
+        cursor=cursor,
+        count_total=cursor is None or total is None,
     )
+    if counted is not None:
+        total = counted
     total_pages = (total + per_page - 1) // per_page if total > 0 else 1
-    databases = db.query(Database).order_by(Database.alias).all()
-    api_keys = db.query(ApiKey).order_by(ApiKey.id).all()
-    return templates.TemplateResponse(
-        "admin_audit_logs.html",
+    databases, api_keys = await _audit_filter_options(db)
+    return _render(
+        _T_AUDIT_LOGS,
         {
+            **_BASE_CTX[lang],
             "request": request,
-            "t": I18N[lang],
-            "lang": lang,
             "active_section": "audit_logs",
             "entries": entries_page,
             "page": page,
             "per_page": per_page,
             "total": total,
             "total_pages": total_pages,
+            "next_cursor_ts": next_cursor[0].isoformat() if next_cursor else "",
+            "next_cursor_id": next_cursor[1] if next_cursor else "",
             "filter_db_alias": db_alias or "",
             "filter_api_key": api_key or "",
             "filter_date_from": date_from or "",
@@ -425,11 +619,11 @@ def admin_ui_audit_logs(
 
 
 @router.get("/ui/databases/new", response_class=HTMLResponse)
-def admin_ui_new_database_form(request: Request, db=Depends(get_db), _: str = Depends(get_admin_username)):
+async def admin_ui_new_database_form(request: Request, _: str = Depends(get_admin_username)):
     lang = _get_lang(request)
-    return templates.TemplateResponse(
-        "admin_database_new.html",
-        {"request": request, "t": I18N[lang], "lang": lang, "active_section": "databases"},
+    return _render(
+        _T_DATABASE_NEW,
+        {**_BASE_CTX[lang], "request": request, "active_section": "databases"},
     )
 
 
@@ -442,59 +636,80 @@ class TestConnectionBody(BaseModel):
     database: Optional[str] = None
 
 
+# 探测语句按库类型预先构建，TextClause 只创建一次
+_NEEDS_DUAL = frozenset(("oracle", "dm"))
+_PROBE_SQL = {
+    db_type: text("SELECT 1 FROM DUAL") if db_type in _NEEDS_DUAL else text("SELECT 1")
+    for db_type in SUPPORTED_DB_TYPE_SET
+}
+
+
+def _build_test_config(src) -> tuple[Optional[DatabaseConfig], Optional[str]]:
+    """
+    由已保存的 Database 或 TestConnectionBody（字段同名）构建测试连接用的 DatabaseConfig。
+    返回 (cfg, None)；参数不合法时返回 (None, 错误信息)。
+    """
+    db_type = src.type
+    if db_type not in SUPPORTED_DB_TYPE_SET:
+        # 表单/库里通常已是规范小写值，只有未命中时才做 strip/lower
+        db_type = (db_type or "").strip().lower()
+    if db_type not in SUPPORTED_DB_TYPE_SET:
+        return None, f"Unsupported type: {src.type}"
+    database = (src.database or "").strip()
+    if db_type == "sqlite":
+        if not database:
+            return None, "Database path is required for SQLite"
+        return DatabaseConfig(alias="test", type="sqlite", mode="direct", database=database), None
+    if db_type != "dm" and not database:
+        return None, "Database name is required"
+    return DatabaseConfig(
+        alias="test",
+        type=db_type,
+        mode="direct",
+        host=(src.host or "").strip() or "localhost",
+        port=src.port if src.port is not None else DEFAULT_PORTS.get(db_type, 5432),
+        user=(src.user or "").strip(),
+        password=src.password or "",
+        database=database or None,
+    ), None
+
+
+def _probe_connection(cfg: DatabaseConfig, *, cached: bool = True) -> dict:
+    """
+    从连接池取一个连接执行探测 SQL；阻塞调用，异步路由中需放到线程池执行。
+    cached=True（已保存的库）：使用按连接 URL 缓存、与 API 查询共用的 Engine，成功时保留连接池供后续复用，
+    空闲超时后由缓存淘汰；失败时将其移出缓存并 dispose，丢弃可能已失效的连接。
+    cached=False（表单中未保存的配置）：一次性 Engine，探测后立即 dispose，不在进程中保留到远端的连接。
+    """
+    engine = None
+    try:
+        engine = create_sqlalchemy_engine(cfg, cached=cached)
+        with engine.connect() as conn:
+            conn.execute(_PROBE_SQL[cfg.type])
+        return {"ok": True}
+    except Exception as e:
+        if engine is not None and cached:
+            discard_sqlalchemy_engine(cfg)
+        return {"ok": False, "error": str(e)}
+    finally:
+        if engine is not None and not cached:
+            engine.dispose()
+
+
 @router.post("/api/databases/{database_id}/test-connection")
-def admin_api_test_database_connection_by_id(
+async def admin_api_test_database_connection_by_id(
     database_id: int,
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
     """Test database connection using stored config. Returns { \"ok\": true } or { \"ok\": false, \"error\": \"...\" }."""
-    database = db.query(Database).filter(Database.id == database_id).first()
+    database = await db.get(Database, database_id)
     if not database:
         return {"ok": False, "error": "Database not found"}
-    db_type = (database.type or "").strip().lower()
-    if db_type not in SUPPORTED_DB_TYPES:
-        return {"ok": False, "error": f"Unsupported type: {database.type}"}
-    if db_type == "sqlite":
-        if not (database.database or "").strip():
-            return {"ok": False, "error": "Database path is required for SQLite"}
-        cfg = DatabaseConfig(
-            alias="test",
-            type="sqlite",
-            mode="direct",
-            host=None,
-            port=None,
-            user=None,
-            password=None,
-            database=(database.database or "").strip(),
-        )
-    else:
-        host = (database.host or "").strip() or "localhost"
-        port = database.port if database.port is not None else DEFAULT_PORTS.get(db_type, 5432)
-        user = (database.user or "").strip()
-        password = database.password or ""
-        database_name = (database.database or "").strip()
-        if db_type != "dm" and not database_name:
-            return {"ok": False, "error": "Database name is required"}
-        cfg = DatabaseConfig(
-            alias="test",
-            type=db_type,
-            mode="direct",
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database_name or None,
-        )
-    try:
-        engine = create_sqlalchemy_engine(cfg)
-        probe_sql = "SELECT 1 FROM DUAL" if db_type in ("oracle", "dm") else "SELECT 1"
-        with engine.connect() as conn:
-            conn.execute(text(probe_sql))
-        engine.dispose()
-        return {"ok": True}
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+    cfg, error = _build_test_config(database)
+    if cfg is None:
+        return {"ok": False, "error": error}
+    return await run_in_threadpool(_probe_connection, cfg)
 
 
 @router.post("/api/databases/test-connection")
@@ -503,281 +718,271 @@ def admin_api_test_database_connection(
     _: str = Depends(get_admin_username),
 ):
     """Test database connection without saving. Returns { \"ok\": true } or { \"ok\": false, \"error\": \"...\" }."""
-    db_type = (body.type or "").strip().lower()
-    if db_type not in SUPPORTED_DB_TYPES:
-        return {"ok": False, "error": f"Unsupported type: {body.type}"}
-    if db_type == "sqlite":
-        if not (body.database or "").strip():
-            return {"ok": False, "error": "Database path is required for SQLite"}
-        cfg = DatabaseConfig(
-            alias="test",
-            type="sqlite",
-            mode="direct",
-            host=None,
-            port=None,
-            user=None,
-            password=None,
-            database=(body.database or "").strip(),
-        )
-    else:
-        host = (body.host or "").strip() or "localhost"
-        port = body.port if body.port is not None else DEFAULT_PORTS.get(db_type, 5432)
-        user = (body.user or "").strip()
-        password = body.password or ""
-        database = (body.database or "").strip()
-        if db_type != "dm" and not database:
-            return {"ok": False, "error": "Database name is required"}
-        cfg = DatabaseConfig(
-            alias="test",
-            type=db_type,
-            mode="direct",
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database or None,
-        )
-    try:
-        engine = create_sqlalchemy_engine(cfg)
-        probe_sql = "SELECT 1 FROM DUAL" if db_type in ("oracle", "dm") else "SELECT 1"
-        with engine.connect() as conn:
-            conn.execute(text(probe_sql))
-        engine.dispose()
-        return {"ok": True}
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+    cfg, error = _build_test_config(body)
+    if cfg is None:
+        return {"ok": False, "error": error}
+    return _probe_connection(cfg, cached=False)
 
 
 @router.get("/ui/api-keys", response_class=HTMLResponse)
-def admin_ui_api_keys(
+async def admin_ui_api_keys(
     request: Request,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
+    etag = _page_etag(request)
+    if (not_modified := _not_modified(request, etag)) is not None:
+        return not_modified
     lang = _get_lang(request)
-    total = db.query(ApiKey).count()
-    offset = (page - 1) * per_page
-    keys = db.query(ApiKey).order_by(ApiKey.id.desc()).offset(offset).limit(per_page).all()
-    for k in keys:
-        _ = list(k.assignments)
+    keys, total = await _paginate(db, ApiKey, _API_KEY_LIST_COLUMNS, page, per_page)
+    assignments = await _group_by_first(
+        db,
+        select(ApiKeyDatabase.api_key_id, ApiKeyDatabase.permission_level, Database.alias)
+        .join(Database, Database.id == ApiKeyDatabase.database_id)
+        .where(ApiKeyDatabase.api_key_id.in_([k.id for k in keys])),
+    )
     total_pages = (total + per_page - 1) // per_page if total > 0 else 1
-    return templates.TemplateResponse(
-        "admin_api_keys.html",
+    return _render(
+        _T_API_KEYS,
         {
+            **_BASE_CTX[lang],
             "request": request,
-            "t": I18N[lang],
-            "lang": lang,
             "active_section": "api_keys",
             "api_keys": keys,
+            "assignments": assignments,
             "page": page,
             "per_page": per_page,
             "total": total,
             "total_pages": total_pages,
         },
+        etag=etag,
     )
 
 
 @router.get("/ui/api-keys/new", response_class=HTMLResponse)
-def admin_ui_new_api_key_form(request: Request, db=Depends(get_db), _: str = Depends(get_admin_username)):
+async def admin_ui_new_api_key_form(request: Request, _: str = Depends(get_admin_username)):
     lang = _get_lang(request)
-    return templates.TemplateResponse(
-        "admin_api_key_new.html",
-        {"request": request, "t": I18N[lang], "lang": lang, "active_section": "api_keys"},
+    return _render(
+        _T_API_KEY_NEW,
+        {**_BASE_CTX[lang], "request": request, "active_section": "api_keys"},
     )
 
 
+def _generate_api_key() -> tuple[str, str]:
+    """生成新的 API Key，返回 (明文 key, 哈希)。明文只在本次重定向中展示一次，不入库。"""
+    raw_key = "sk_" + base64.urlsafe_b64encode(os.urandom(24)).rstrip(b"=").decode("ascii")
+    return raw_key, hash_api_key(raw_key)
+
+
 @router.post("/ui/api-keys", response_class=HTMLResponse)
-def admin_ui_create_api_key(
+async def admin_ui_create_api_key(
     request: Request,
     name: str = Form(...),
     lang: Optional[str] = Form(None),
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    raw_key = "sk_" + secrets.token_urlsafe(24)
-    key_hash = hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+    raw_key, key_hash = _generate_api_key()
     api_key = ApiKey(
         key_hash=key_hash,
-        raw_key=raw_key,
+        key_hint=make_key_hint(raw_key),
         permission_level="readonly",
         name=name.strip(),
     )
     db.add(api_key)
-    db.commit()
-    qs = f"generated_key={raw_key}"
-    if lang and lang in I18N:
-        qs += f"&lang={lang}"
-    return RedirectResponse(url=f"/admin/ui/api-keys?{qs}", status_code=303)
+    await db.commit()
+    _admin_data_changed()
+    if lang in _LANGS:
+        url = f"{_KEY_LIST_URL[lang]}&generated_key={raw_key}"
+    else:
+        url = f"/admin/ui/api-keys?generated_key={raw_key}"
+    return RedirectResponse(url=url, status_code=303)
 
 
 @router.get("/ui/api-keys/{key_id}", response_class=HTMLResponse)
-def admin_ui_api_key_detail(
+async def admin_ui_api_key_detail(
     key_id: int,
     request: Request,
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    api_key = db.query(ApiKey).filter(ApiKey.id == key_id).first()
+    etag = _page_etag(request)
+    if (not_modified := _not_modified(request, etag)) is not None:
+        return not_modified
+    api_key = await db.get(ApiKey, key_id, options=[_API_KEY_ASSIGNMENTS])
     if not api_key:
         return RedirectResponse(url="/admin/ui/api-keys", status_code=303)
-    _ = list(api_key.assignments)
-    bound_ids = {a.database_id for a in api_key.assignments}
-    all_dbs = db.query(Database).all()
-    unbound_databases = [d for d in all_dbs if d.id not in bound_ids]
+    # 未绑定的库在数据库端用子查询过滤，只取 id/alias 两列
+    bound_ids = select(ApiKeyDatabase.database_id).where(ApiKeyDatabase.api_key_id == key_id)
+    unbound_databases = (
+        await db.execute(
+            select(Database.id, Database.alias).where(Database.id.not_in(bound_ids)).order_by(Database.id)
+        )
+    ).all()
     lang = _get_lang(request)
-    return templates.TemplateResponse(
-        "admin_api_key_detail.html",
+    return _render(
+        _T_API_KEY_DETAIL,
         {
+            **_BASE_CTX[lang],
             "request": request,
-            "t": I18N[lang],
-            "lang": lang,
             "active_section": "api_keys",
             "api_key": api_key,
             "unbound_databases": unbound_databases,
         },
+        etag=etag,
     )
 
 
 @router.get("/ui/api-keys/{key_id}/edit", response_class=HTMLResponse)
-def admin_ui_edit_api_key(
+async def admin_ui_edit_api_key(
     key_id: int,
     request: Request,
     _: str = Depends(get_admin_username),
 ):
     lang = _get_lang(request)
-    return RedirectResponse(url=f"/admin/ui/api-keys/{key_id}?lang={lang}", status_code=302)
+    return RedirectResponse(url=_KEY_DETAIL_URL[lang].format(key_id), status_code=302)
 
 
 @router.get("/ui/api-keys/{key_id}/databases", response_class=HTMLResponse)
-def admin_ui_api_key_databases_redirect(
+async def admin_ui_api_key_databases_redirect(
     key_id: int,
     request: Request,
     _: str = Depends(get_admin_username),
 ):
     lang = _get_lang(request)
-    return RedirectResponse(url=f"/admin/ui/api-keys/{key_id}?lang={lang}", status_code=302)
+    return RedirectResponse(url=_KEY_DETAIL_URL[lang].format(key_id), status_code=302)
 
 
 @router.post("/ui/api-keys/{key_id}/update", response_class=HTMLResponse)
-def admin_ui_update_api_key(
+async def admin_ui_update_api_key(
     key_id: int,
     request: Request,
     name: str = Form(""),
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    api_key = db.query(ApiKey).filter(ApiKey.id == key_id).first()
-    if not api_key:
+    result = await db.execute(update(ApiKey).where(ApiKey.id == key_id).values(name=name.strip() or None))
+    await db.commit()
+    if result.rowcount == 0:
         return RedirectResponse(url="/admin/ui/api-keys", status_code=303)
-    api_key.name = name.strip() or None
-    db.commit()
+    _admin_data_changed()
+    invalidate_api_key_cache(key_id)
     lang = _get_lang(request)
-    return RedirectResponse(url=f"/admin/ui/api-keys/{key_id}?lang={lang}", status_code=303)
+    return RedirectResponse(url=_KEY_DETAIL_URL[lang].format(key_id), status_code=303)
 
 
 @router.post("/ui/api-keys/{key_id}/regenerate", response_class=HTMLResponse)
-def admin_ui_regenerate_api_key(
+async def admin_ui_regenerate_api_key(
     key_id: int,
     request: Request,
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    api_key = db.query(ApiKey).filter(ApiKey.id == key_id).first()
-    if not api_key:
+    raw_key, key_hash = _generate_api_key()
+    result = await db.execute(
+        update(ApiKey).where(ApiKey.id == key_id).values(key_hash=key_hash, key_hint=make_key_hint(raw_key))
+    )
+    await db.commit()
+    if result.rowcount == 0:
         return RedirectResponse(url="/admin/ui/api-keys", status_code=303)
-    raw_key = "sk_" + secrets.token_urlsafe(24)
-    api_key.key_hash = hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
-    api_key.raw_key = raw_key
-    db.commit()
+    _admin_data_changed()
+    invalidate_api_key_cache(key_id)
     lang = _get_lang(request)
-    qs = f"generated_key={raw_key}&lang={lang}" if lang else f"generated_key={raw_key}"
-    return RedirectResponse(url=f"/admin/ui/api-keys/{key_id}?{qs}", status_code=303)
+    url = f"{_KEY_DETAIL_URL[lang].format(key_id)}&generated_key={raw_key}"
+    return RedirectResponse(url=url, status_code=303)
 
 
 @router.post("/ui/api-keys/{key_id}/toggle-enabled", response_class=HTMLResponse)
-def admin_ui_toggle_api_key_enabled(
+async def admin_ui_toggle_api_key_enabled(
     key_id: int,
     request: Request,
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    api_key = db.query(ApiKey).filter(ApiKey.id == key_id).first()
-    if not api_key:
+    # 在库内取反，无需先读出当前状态
+    result = await db.execute(update(ApiKey).where(ApiKey.id == key_id).values(enabled=~ApiKey.enabled))
+    await db.commit()
+    if result.rowcount == 0:
         return RedirectResponse(url="/admin/ui/api-keys", status_code=303)
-    api_key.enabled = not api_key.enabled
-    db.commit()
+    _admin_data_changed()
+    invalidate_api_key_cache(key_id)
     lang = _get_lang(request)
-    return RedirectResponse(url=f"/admin/ui/api-keys/{key_id}?lang={lang}", status_code=303)
+    return RedirectResponse(url=_KEY_DETAIL_URL[lang].format(key_id), status_code=303)
 
 
 @router.post("/ui/api-keys/{key_id}/delete", response_class=HTMLResponse)
-def admin_ui_revoke_api_key(
+async def admin_ui_revoke_api_key(
     key_id: int,
     request: Request,
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    api_key = db.query(ApiKey).filter(ApiKey.id == key_id).first()
-    if api_key:
-        db.delete(api_key)
-        db.commit()
+    # 直接按 id 删除；关联表不依赖 ORM 级联，一并显式删除
+    await db.execute(delete(ApiKeyDatabase).where(ApiKeyDatabase.api_key_id == key_id))
+    result = await db.execute(delete(ApiKey).where(ApiKey.id == key_id))
+    await db.commit()
+    if result.rowcount:
+        _admin_data_changed()
+        invalidate_api_key_cache(key_id)
     lang = _get_lang(request)
-    return RedirectResponse(url=f"/admin/ui/api-keys?lang={lang}", status_code=303)
+    return RedirectResponse(url=_KEY_LIST_URL[lang], status_code=303)
 
 
 @router.post("/ui/api-keys/{key_id}/databases", response_class=HTMLResponse)
-def admin_ui_api_key_bind_database(
+async def admin_ui_api_key_bind_database(
     key_id: int,
     request: Request,
     permission_level: str = Form("readonly"),
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    api_key = db.query(ApiKey).filter(ApiKey.id == key_id).first()
+    api_key = await db.get(ApiKey, key_id)
     if not api_key:
         return RedirectResponse(url="/admin/ui/api-keys", status_code=303)
-    try:
-        raw_ids = request.form.getlist("database_id")
-    except Exception:
-        raw_ids = []
-    database_ids = []
+    # 多选框提交多个 database_id；表单已由 Form 参数解析并缓存，这里直接取全部取值
+    raw_ids = (await request.form()).getlist("database_id")
+    database_ids = set()
     for x in raw_ids:
         try:
-            database_ids.append(int(x))
+            database_ids.add(int(x))
         except (TypeError, ValueError):
             pass
-    bound_ids = {a.database_id for a in api_key.assignments}
-    for database_id in database_ids:
-        if database_id in bound_ids:
-            continue
-        database = db.query(Database).filter(Database.id == database_id).first()
-        if database:
-            db.add(ApiKeyDatabase(api_key_id=key_id, database_id=database_id, permission_level=permission_level))
-            bound_ids.add(database_id)
-    db.commit()
+    bound_ids = set(
+        await db.scalars(select(ApiKeyDatabase.database_id).where(ApiKeyDatabase.api_key_id == key_id))
+    )
+    requested = database_ids - bound_ids
+    if requested:
+        # 一次 IN 查询过滤掉不存在的库，再一条批量 INSERT 写入全部关联
+        existing = await db.scalars(select(Database.id).where(Database.id.in_(requested)))
+        rows = [
+            {"api_key_id": key_id, "database_id": database_id, "permission_level": permission_level}
+            for database_id in existing
+        ]
+        if rows:
+            await db.execute(insert(ApiKeyDatabase), rows)
+            await db.commit()
+            _admin_data_changed()
     lang = _get_lang(request)
-    return RedirectResponse(url=f"/admin/ui/api-keys/{key_id}?lang={lang}", status_code=303)
+    return RedirectResponse(url=_KEY_DETAIL_URL[lang].format(key_id), status_code=303)
 
 
 @router.post("/ui/api-keys/{key_id}/databases/unbind", response_class=HTMLResponse)
-def admin_ui_api_key_unbind_database(
+async def admin_ui_api_key_unbind_database(
     key_id: int,
     request: Request,
     database_id: int = Form(...),
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    assignment = db.query(ApiKeyDatabase).filter(
-        ApiKeyDatabase.api_key_id == key_id,
-        ApiKeyDatabase.database_id == database_id,
-    ).first()
-    if assignment:
-        db.delete(assignment)
-        db.commit()
+    await db.execute(
+        delete(ApiKeyDatabase).where(ApiKeyDatabase.api_key_id == key_id, ApiKeyDatabase.database_id == database_id)
+    )
+    await db.commit()
+    _admin_data_changed()
     lang = _get_lang(request)
-    return RedirectResponse(url=f"/admin/ui/api-keys/{key_id}?lang={lang}", status_code=303)
+    return RedirectResponse(url=_KEY_DETAIL_URL[lang].format(key_id), status_code=303)
 
 
 # ---- 数据库 CRUD（API 模式：后台维护连接信息并分配给账号） ----
@@ -792,7 +997,7 @@ def _parse_port(v: Optional[str]) -> Optional[int]:
 
 
 @router.post("/ui/databases", response_class=HTMLResponse)
-def admin_ui_create_database(
+async def admin_ui_create_database(
     request: Request,
     alias: str = Form(...),
     type: str = Form("postgres"),
@@ -802,7 +1007,7 @@ def admin_ui_create_database(
     password: Optional[str] = Form(None),
     database: Optional[str] = Form(None),
     lang: Optional[str] = Form(None),
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
     d = Database(
@@ -816,50 +1021,56 @@ def admin_ui_create_database(
         permission_level="readonly",
     )
     db.add(d)
-    db.commit()
-    url = "/admin/ui/databases"
-    if lang and lang in I18N:
-        url += f"?lang={lang}"
+    await db.commit()
+    _admin_data_changed()
+    url = _DATABASE_LIST_URL[lang] if lang in _LANGS else "/admin/ui/databases"
     return RedirectResponse(url=url, status_code=303)
 
 
 @router.get("/ui/databases/{database_id}", response_class=HTMLResponse)
-def admin_ui_database_detail(
+async def admin_ui_database_detail(
     database_id: int,
     request: Request,
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    database = db.query(Database).filter(Database.id == database_id).first()
+    etag = _page_etag(request)
+    if (not_modified := _not_modified(request, etag)) is not None:
+        return not_modified
+    database = await db.get(Database, database_id, options=[_DATABASE_ASSIGNMENTS])
     if not database:
         return RedirectResponse(url="/admin/ui/databases", status_code=303)
-    _ = list(database.key_assignments)
     lang = _get_lang(request)
-    return templates.TemplateResponse(
-        "admin_database_detail.html",
-        {"request": request, "t": I18N[lang], "lang": lang, "active_section": "databases", "database": database},
+    return _render(
+        _T_DATABASE_DETAIL,
+        {**_BASE_CTX[lang], "request": request, "active_section": "databases", "database": database},
+        etag=etag,
     )
 
 
 @router.get("/ui/databases/{database_id}/edit", response_class=HTMLResponse)
-def admin_ui_edit_database_form(
+async def admin_ui_edit_database_form(
     database_id: int,
     request: Request,
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    database = db.query(Database).filter(Database.id == database_id).first()
+    etag = _page_etag(request)
+    if (not_modified := _not_modified(request, etag)) is not None:
+        return not_modified
+    database = await db.get(Database, database_id)
     if not database:
         return RedirectResponse(url="/admin/ui/databases", status_code=303)
     lang = _get_lang(request)
-    return templates.TemplateResponse(
-        "admin_database_edit.html",
-        {"request": request, "t": I18N[lang], "lang": lang, "active_section": "databases", "database": database},
+    return _render(
+        _T_DATABASE_EDIT,
+        {**_BASE_CTX[lang], "request": request, "active_section": "databases", "database": database},
+        etag=etag,
     )
 
 
 @router.post("/ui/databases/{database_id}/edit", response_class=HTMLResponse)
-def admin_ui_update_database(
+async def admin_ui_update_database(
     database_id: int,
     alias: str = Form(...),
     type: str = Form("postgres"),
@@ -870,31 +1081,36 @@ def admin_ui_update_database(
     database: Optional[str] = Form(None),
     permission_level: str = Form("readonly"),
     lang: Optional[str] = Form(None),
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: str = Depends(get_admin_username),
 ):
-    d = db.query(Database).filter(Database.id == database_id).first()
-    if not d:
-        return RedirectResponse(url="/admin/ui/databases", status_code=303)
-    d.alias = alias.strip()
-    d.type = type.strip()
-    d.host = host.strip() if host else None
-    d.port = _parse_port(port)
-    d.user = user.strip() if user else None
+    values = {
+        "alias": alias.strip(),
+        "type": type.strip(),
+        "host": host.strip() if host else None,
+        "port": _parse_port(port),
+        "user": user.strip() if user else None,
+        "database": database.strip() if database else None,
+        "permission_level": permission_level,
+    }
+    # 密码留空表示不修改
     if password:
-        d.password = password
-    d.database = database.strip() if database else None
-    d.permission_level = permission_level
-    db.commit()
-    redirect_lang = (lang and lang in I18N) and lang or "en"
-    return RedirectResponse(url=f"/admin/ui/databases/{database_id}?lang={redirect_lang}", status_code=303)
+        values["password"] = password
+    result = await db.execute(update(Database).where(Database.id == database_id).values(**values))
+    await db.commit()
+    if result.rowcount == 0:
+        return RedirectResponse(url="/admin/ui/databases", status_code=303)
+    _admin_data_changed()
+    url = _DATABASE_DETAIL_URL[lang if lang in _LANGS else "en"].format(database_id)
+    return RedirectResponse(url=url, status_code=303)
 
 
 @router.post("/ui/databases/{database_id}/delete", response_class=HTMLResponse)
-def admin_ui_delete_database(database_id: int, db=Depends(get_db), _: str = Depends(get_admin_username)):
-    d = db.query(Database).filter(Database.id == database_id).first()
-    if d:
-        db.delete(d)
-        db.commit()
+async def admin_ui_delete_database(database_id: int, db: AsyncSession = Depends(get_db), _: str = Depends(get_admin_username)):
+    await db.execute(delete(ApiKeyDatabase).where(ApiKeyDatabase.database_id == database_id))
+    result = await db.execute(delete(Database).where(Database.id == database_id))
+    await db.commit()
+    if result.rowcount:
+        _admin_data_changed()
     return RedirectResponse(url="/admin/ui/databases", status_code=303)
 
@@ -7,12 +7,22 @@ API Key 鉴权与权限模型。
 from __future__ import annotations
 
 import hashlib
+import threading
+import time
+from collections import deque
 from dataclasses import dataclass
 from typing import Optional
 
-from fastapi import Depends, Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
+from sqlalchemy.orm import Session
 
-from api.services.models import ApiKey as DbApiKey, init_admin_db, SessionLocal
+from api.services.models import ApiKey as DbApiKey, get_session
+from api.services.settings import load_server_yaml
+
+
+# 权限等级由低到高；鉴权时把 permission_level 预先解析为序号，权限判断只比较整数
+_PERMISSION_LEVELS = ("readonly", "write", "full")
+_PERMISSION_RANK = {level: idx for idx, level in enumerate(_PERMISSION_LEVELS)}
 
 
 @dataclass
@@ -21,41 +31,171 @@ class ApiKey:
     key_id: int
     permission_level: str  # readonly | write | full
     name: Optional[str] = None  # 可选备注
+    level_idx: int = 0  # permission_level 在 _PERMISSION_LEVELS 中的序号，未知等级按 readonly
+
+
+def hash_api_key(token: str) -> str:
+    """API Key 入库哈希：BLAKE2b-256（hex，64 位，与旧 SHA-256 哈希等长）。"""
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=32).hexdigest()
+
+
+def _legacy_hash_api_key(token: str) -> str:
+    """早期版本使用的 SHA-256 哈希，仅用于识别并升级旧 key。"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+# key_hash -> (过期时间, ApiKey 或 None) 的进程内缓存，命中时鉴权不访问 admin.db。
+# TTL 即吊销生效的最长延迟：管理端禁用/删除/重新生成 key 时会主动失效，
+# 多进程部署下其它 worker 最迟在 _API_KEY_CACHE_TTL 秒后生效。
+# 未知 token 以 None 缓存较短时间，避免无效 token 反复打到数据库。
+_API_KEY_CACHE_TTL = 30.0
+_API_KEY_NEGATIVE_TTL = 5.0
+_API_KEY_CACHE_MAXSIZE = 4096
+_api_key_cache: dict[str, tuple[float, Optional[ApiKey]]] = {}
+_api_key_cache_lock = threading.Lock()
+
+
+def _query_api_key(db: Session, token: str, key_hash: str) -> Optional[ApiKey]:
+    """从 admin.db 根据 token 查找 ApiKey。旧 SHA-256 哈希的 key 命中后就地升级为 BLAKE2b。"""
+    legacy_hash = _legacy_hash_api_key(token)
+    db_key = db.query(DbApiKey).filter(DbApiKey.key_hash.in_((key_hash, legacy_hash))).first()
+    if not db_key or not getattr(db_key, "enabled", True):
+        return None
+    if db_key.key_hash != key_hash:
+        db_key.key_hash = key_hash
+        db.commit()
+    return ApiKey(
+        key=token,
+        key_id=db_key.id,
+        permission_level=db_key.permission_level,
+        name=db_key.name,
+        level_idx=_PERMISSION_RANK.get(db_key.permission_level, 0),
+    )
+
+
+def _lookup_api_key(db: Session, token: str) -> Optional[ApiKey]:
+    """按 token 解析 ApiKey，优先走进程内缓存。"""
+    key_hash = hash_api_key(token)
+    now = time.monotonic()
+    cached = _api_key_cache.get(key_hash)
+    if cached and cached[0] > now:
+        return cached[1]
+    api_key = _query_api_key(db, token, key_hash)
+    ttl = _API_KEY_CACHE_TTL if api_key is not None else _API_KEY_NEGATIVE_TTL
+    with _api_key_cache_lock:
+        if len(_api_key_cache) >= _API_KEY_CACHE_MAXSIZE:
+            for h in [h for h, (exp, _) in _api_key_cache.items() if exp <= now]:
+                del _api_key_cache[h]
+            if len(_api_key_cache) >= _API_KEY_CACHE_MAXSIZE:
+                # 仍然满：按插入顺序淘汰最早的一条
+                _api_key_cache.pop(next(iter(_api_key_cache)), None)
+        _api_key_cache[key_hash] = (now + ttl, api_key)
+    return api_key
 
 
-def _lookup_api_key(token: str) -> Optional[ApiKey]:
-    """从 admin.db 根据 token 查找 ApiKey。"""
-    init_admin_db()
-    key_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
-    db = SessionLocal()
-    try:
-        db_key = db.query(DbApiKey).filter(DbApiKey.key_hash == key_hash).first()
-        if not db_key or not getattr(db_key, "enabled", True):
-            return None
-        return ApiKey(
-            key=token,
-            key_id=db_key.id,
-            permission_level=db_key.permission_level,
-            name=db_key.name,
+def invalidate_api_key_cache(key_id: Optional[int] = None) -> None:
+    """
+    管理端修改/禁用/删除/重新生成 key 后调用。
+    传入 key_id 时清除该 key 的缓存及全部未命中记录；不传则清空整个缓存。
+    """
+    with _api_key_cache_lock:
+        if key_id is None:
+            _api_key_cache.clear()
+            return
+        for h in [h for h, (_, k) in _api_key_cache.items() if k is None or k.key_id == key_id]:
+            del _api_key_cache[h]
+
+
+@dataclass
+class AuthThrottleConfig:
+    enabled: bool = False
+    max_failures: int = 30
+    window_seconds: float = 10.0
+    # 反向代理地址（精确 IP）：请求来自这些地址时，按 X-Forwarded-For 中最右侧的非代理地址计数
+    trusted_proxies: frozenset[str] = frozenset()
+
+
+def _load_auth_throttle_config() -> AuthThrottleConfig:
+    tc = load_server_yaml().get("auth_throttle") or {}
+    return AuthThrottleConfig(
+        enabled=bool(tc.get("enabled", False)),
+        max_failures=int(tc.get("max_failures", 30)),
+        window_seconds=float(tc.get("window_seconds", 10.0)),
+        trusted_proxies=frozenset(str(p) for p in tc.get("trusted_proxies") or ()),
+    )
+
+
+AUTH_THROTTLE_CONFIG = _load_auth_throttle_config()
+
+# 按客户端地址统计鉴权失败（默认关闭，见 server.yaml 的 auth_throttle）：只在 token 校验失败后检查与计数，
+# 有效 token 永远不受限；窗口内失败次数达到上限后该客户端的失败请求返回 429。
+# 跟踪的客户端数有上限，按最近失败时间逐个淘汰最久未失败的客户端，而不是整体清空
+_AUTH_FAIL_MAX_CLIENTS = 10_000
+_auth_failures: dict[str, deque[float]] = {}
+_auth_failures_lock = threading.Lock()
+
+
+def _client_address(request: Request) -> str:
+    host = request.client.host if request.client else ""
+    trusted = AUTH_THROTTLE_CONFIG.trusted_proxies
+    if host in trusted:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            for addr in reversed(forwarded.split(",")):
+                addr = addr.strip()
+                if addr and addr not in trusted:
+                    return addr
+    return host
+
+
+def _throttle_auth_failure(client: str, now: float) -> None:
+    """记录一次鉴权失败；窗口内失败次数已达上限时抛出 429。"""
+    cfg = AUTH_THROTTLE_CONFIG
+    cutoff = now - cfg.window_seconds
+    with _auth_failures_lock:
+        hits = _auth_failures.pop(client, None)
+        if hits is None:
+            while len(_auth_failures) >= _AUTH_FAIL_MAX_CLIENTS:
+                del _auth_failures[next(iter(_auth_failures))]
+            hits = deque(maxlen=cfg.max_failures)
+        else:
+            while hits and hits[0] <= cutoff:
+                hits.popleft()
+        # 重新插入到末尾：字典顺序即最近失败时间顺序，淘汰时从头部开始
+        _auth_failures[client] = hits
+        throttled = len(hits) >= cfg.max_failures
+        if not throttled:
+            hits.append(now)
+    if throttled:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed authentication attempts",
         )
-    finally:
-        db.close()
 
 
-def _get_api_key(authorization: Optional[str]) -> ApiKey:
+def _get_api_key(db: Session, authorization: Optional[str]) -> ApiKey:
     if not authorization:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing Authorization header")
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Authorization header")
     token = authorization[len("Bearer ") :].strip()
-    api_key = _lookup_api_key(token)
+    api_key = _lookup_api_key(db, token)
     if not api_key:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API token")
     return api_key
 
 
-def get_current_api_key(authorization: Optional[str] = Header(default=None)) -> ApiKey:
-    return _get_api_key(authorization)
+def get_current_api_key(
+    request: Request,
+    authorization: Optional[str] = Header(default=None),
+    db: Session = Depends(get_session),
+) -> ApiKey:
+    try:
+        return _get_api_key(db, authorization)
+    except HTTPException:
+        if AUTH_THROTTLE_CONFIG.enabled:
+            _throttle_auth_failure(_client_address(request), time.monotonic())
+        raise
 
 
 def require_permission(required: str):
@@ -65,18 +205,16 @@ def require_permission(required: str):
     - write 允许 schema/query + INSERT/UPDATE；
     - full 允许所有（含 DELETE）。
     """
-    levels = ("readonly", "write", "full")
-    if required not in levels:
+    if required not in _PERMISSION_RANK:
         raise ValueError(f"invalid required permission: {required}")
+    required_idx = _PERMISSION_RANK[required]
 
     def dependency(api_key: ApiKey = Depends(get_current_api_key)) -> ApiKey:
-        current_idx = levels.index(api_key.permission_level)
-        required_idx = levels.index(required)
-        if current_idx < required_idx:
+        if api_key.level_idx < required_idx:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
         return api_key
 
     return dependency
 
 
-__all__ = ["ApiKey", "get_current_api_key", "require_permission"]
+__all__ = ["ApiKey", "get_current_api_key", "hash_api_key", "invalidate_api_key_cache", "require_permission"]
@@ -1,55 +1,83 @@
+import asyncio
 import os
-from pathlib import Path
 
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
-from fastapi.responses import RedirectResponse
-from starlette.middleware.sessions import SessionMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, RedirectResponse, Response
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from api.services.logging_config import setup_logging
 
 setup_logging()
 
-from api.admin.auth import AdminLoginRequired
+from api.admin.auth import (
+    AdminLoginRequired,
+    AdminSessionMiddleware,
+    bootstrap_admin,
+    calibrate_password_hashing,
+)
 from api.routes import databases as databases_routes
 from api.routes import execute as execute_routes
 from api.routes import query as query_routes
 from api.routes import schema as schema_routes
 from api.admin import router as admin_router
-from api.services.models import init_admin_db
+from api.services.audit import start_audit_writer, stop_audit_writer
+from api.services.settings import load_server_yaml
+from api.services.models import async_engine, warm_admin_pool, warm_admin_pool_async
+from dbskill.utils import evict_idle_sqlalchemy_engines
 
 
 def _get_session_secret() -> str:
     """优先级：server.yaml session_secret > 环境变量 SESSION_SECRET > 默认值。"""
-    base = Path(__file__).resolve().parents[1]
-    server_path = base / "server.yaml"
-    if server_path.is_file():
-        import yaml
-        with server_path.open("r", encoding="utf-8") as f:
-            raw = yaml.safe_load(f) or {}
-        val = raw.get("session_secret") if isinstance(raw.get("session_secret"), str) else None
-        if val:
-            return val
+    val = load_server_yaml().get("session_secret")
+    if isinstance(val, str) and val:
+        return val
     return os.environ.get("SESSION_SECRET", "dev-secret-change-in-production")
 
 
 SESSION_SECRET = _get_session_secret()
 
 
+# 定期释放空闲的 Direct 模式 Engine：没有新查询时缓存里的连接池也不会一直占着远端连接
+_ENGINE_EVICT_INTERVAL = 60.0
+
+
+async def _evict_idle_engines_periodically() -> None:
+    while True:
+        await asyncio.sleep(_ENGINE_EVICT_INTERVAL)
+        await run_in_threadpool(evict_idle_sqlalchemy_engines)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_admin_db()
+    calibrate_password_hashing()
+    bootstrap_admin()
+    warm_admin_pool()
+    await warm_admin_pool_async()
+    start_audit_writer()
+    evictor = asyncio.create_task(_evict_idle_engines_periodically())
     yield
+    evictor.cancel()
+    stop_audit_writer()
+    await async_engine.dispose()
 
 
 app = FastAPI(title="DBSkill API", version="0.1.0", lifespan=lifespan)
-app.add_middleware(SessionMiddleware, secret_key=SESSION_SECRET)
+app.add_middleware(AdminSessionMiddleware, secret_key=SESSION_SECRET)
 
 
 @app.exception_handler(AdminLoginRequired)
 def _admin_login_redirect(_request: Request, exc: AdminLoginRequired):
-    return RedirectResponse(url=exc.url, status_code=303)
+    # exc.url 为应用内固定路径，无需 RedirectResponse 的 URL 转义
+    return Response(status_code=303, headers={"location": exc.url})
+
+
+@app.exception_handler(PoolTimeoutError)
+def _pool_timeout(_request: Request, _exc: PoolTimeoutError):
+    # 连接池在 pool_timeout 内取不到连接：直接 503，让调用方退避重试
+    return JSONResponse(status_code=503, content={"detail": "Database connection pool exhausted"})
 
 
 @app.get("/")
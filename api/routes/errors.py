@@ -0,0 +1,27 @@
+"""
+Skill 调用异常到 HTTP 错误的统一映射，供 query/execute/schema 路由共用。
+"""
+
+from __future__ import annotations
+
+from fastapi import HTTPException, status
+
+# 按顺序匹配：权限不足 403，SQL/参数不合法 400，其余 500
+_SKILL_ERROR_STATUS = (
+    (PermissionError, status.HTTP_403_FORBIDDEN),
+    (ValueError, status.HTTP_400_BAD_REQUEST),
+)
+
+
+def skill_http_error(e: Exception, action: str) -> HTTPException:
+    """将 Skill 抛出的异常转换为 HTTPException；未识别的异常以 "<action> failed: ..." 返回 500。"""
+    for exc_type, code in _SKILL_ERROR_STATUS:
+        if isinstance(e, exc_type):
+            return HTTPException(status_code=code, detail=str(e))
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"{action} failed: {str(e)}",
+    )
+
+
+__all__ = ["skill_http_error"]
@@ -1,13 +1,17 @@
 from typing import Any, Dict, Mapping, Optional
-import uuid
+import os
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 
 from api.auth import ApiKey, require_permission
 from api.services.audit import write_api_audit_log
 from api.services.backend_db import get_db_config_for_api
+from api.routes.errors import skill_http_error
+from api.services.models import get_session
 from dbskill.scripts.execute import run_execute as skill_run_execute
+from dbskill.utils import _normalize_sql_prefix
 
 
 class ExecuteRequest(BaseModel):
@@ -17,17 +21,19 @@ class ExecuteRequest(BaseModel):
 
 
 def _sql_is_delete(sql: str) -> bool:
-    prefix = sql.strip().split(None, 1)[0].lower() if sql.strip() else ""
-    return prefix.startswith("delete")
+    # 与 Skill 侧 ensure_write_sql 使用同一首词解析（跳过开头注释），两处 DELETE 判定不会因注释位置而不一致
+    return _normalize_sql_prefix(sql) == "delete"
 
 
 router = APIRouter(prefix="/execute", tags=["execute"])
 
 
-@router.post("", dependencies=[Depends(require_permission("write"))])
+@router.post("")
 async def execute_endpoint(
     request: Request,
+    background: BackgroundTasks,
     payload: ExecuteRequest,
+    db: Session = Depends(get_session),
     api_key: ApiKey = Depends(require_permission("write")),
 ) -> Dict[str, Any]:
     """
@@ -38,48 +44,29 @@ async def execute_endpoint(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="DELETE requires full permission")
 
     try:
-        db_cfg = get_db_config_for_api(api_key.key_id, payload.db_alias)
+        db_cfg = get_db_config_for_api(db, api_key.key_id, payload.db_alias)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        # 配置解析完即结束读事务并归还 admin.db 连接：远程查询与审计期间不占用连接池，也不挡住 WAL 检查点
+        db.close()
 
-    trace_id = uuid.uuid4().hex
+    trace_id = os.urandom(16).hex()
 
+    # 成功时审计交给 BackgroundTasks（写入线程关闭时生效）；失败时抛出 HTTPException 会丢弃
+    # BackgroundTasks，因此失败分支同步写入
+    audit_background = None
     try:
         affected = skill_run_execute(
             sql=payload.sql,
             params=payload.params,
             db_cfg=db_cfg,
         )
-        write_api_audit_log(
-            request=request,
-            api_key=api_key,
-            sql=payload.sql,
-            params=payload.params,
-            db_alias=db_cfg.alias,
-            trace_id=trace_id,
-        )
+        audit_background = background
         return {"data": {"rows_affected": affected}, "trace_id": trace_id}
-    except PermissionError as e:
-        write_api_audit_log(
-            request=request,
-            api_key=api_key,
-            sql=payload.sql,
-            params=payload.params,
-            db_alias=db_cfg.alias,
-            trace_id=trace_id,
-        )
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
-    except ValueError as e:
-        write_api_audit_log(
-            request=request,
-            api_key=api_key,
-            sql=payload.sql,
-            params=payload.params,
-            db_alias=db_cfg.alias,
-            trace_id=trace_id,
-        )
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
+        raise skill_http_error(e, "Execute")
+    finally:
         write_api_audit_log(
             request=request,
             api_key=api_key,
@@ -87,10 +74,5 @@ async def execute_endpoint(
             params=payload.params,
             db_alias=db_cfg.alias,
             trace_id=trace_id,
+            background=audit_background,
         )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Execute failed: {str(e)}",
-        )
-
-
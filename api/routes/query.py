@@ -1,12 +1,19 @@
-from typing import Any, Dict, List, Mapping, Optional
-import uuid
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Mapping, Optional, Sequence
+import json
+import os
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 
 from api.auth import ApiKey, require_permission
 from api.services.audit import write_api_audit_log
 from api.services.backend_db import get_db_config_for_api
+from api.routes.errors import skill_http_error
+from api.services.models import get_session
 from dbskill.scripts.query import run_query as skill_run_query
 
 
@@ -19,57 +26,72 @@ class QueryRequest(BaseModel):
 router = APIRouter(prefix="/query", tags=["query"])
 
 
-@router.post("", dependencies=[Depends(require_permission("readonly"))])
+def _json_default(o: Any) -> Any:
+    """orjson 不直接支持的类型：RowMapping 转 dict，其余与 FastAPI jsonable_encoder 的转换保持一致。"""
+    if isinstance(o, Mapping):
+        return dict(o)
+    if isinstance(o, Decimal):
+        return int(o) if o.as_tuple().exponent >= 0 else float(o)
+    if isinstance(o, bytes):
+        return o.decode()
+    if isinstance(o, timedelta):
+        return o.total_seconds()
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    return str(o)
+
+
+def _rows_response(rows: Sequence[Mapping[str, Any]], trace_id: str) -> Response:
+    """
+    直接把查询结果编码为 JSON 响应，不经过 jsonable_encoder 逐行逐值转换；
+    行是 RowMapping，由 _json_default 在序列化时转为 dict。超出 64 位的整数等 orjson 不接受的值退回标准库。
+    """
+    payload = {"data": rows, "trace_id": trace_id}
+    try:
+        body = orjson.dumps(payload, default=_json_default)
+    except TypeError:
+        body = json.dumps(
+            payload, default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("")
 async def query_endpoint(
     request: Request,
+    background: BackgroundTasks,
     payload: QueryRequest,
+    db: Session = Depends(get_session),
     api_key: ApiKey = Depends(require_permission("readonly")),
-) -> Dict[str, Any]:
+) -> Response:
     """
     只读查询接口，内部调用 Skill 的 run_query。库由后台分配。
     """
     try:
-        db_cfg = get_db_config_for_api(api_key.key_id, payload.db_alias)
+        db_cfg = get_db_config_for_api(db, api_key.key_id, payload.db_alias)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    trace_id = uuid.uuid4().hex
+    finally:
+        # 配置解析完即结束读事务并归还 admin.db 连接：远程查询与审计期间不占用连接池，也不挡住 WAL 检查点
+        db.close()
+    trace_id = os.urandom(16).hex()
 
+    # 成功时审计交给 BackgroundTasks（写入线程关闭时生效）；失败时抛出 HTTPException 会丢弃
+    # BackgroundTasks，因此失败分支同步写入
+    audit_background = None
     try:
-        rows: List[Dict[str, Any]] = skill_run_query(
+        rows = skill_run_query(
             sql=payload.sql,
             params=payload.params,
             db_cfg=db_cfg,
+            as_mappings=True,
         )
-        write_api_audit_log(
-            request=request,
-            api_key=api_key,
-            sql=payload.sql,
-            params=payload.params,
-            db_alias=db_cfg.alias,
-            trace_id=trace_id,
-        )
-        return {"data": rows, "trace_id": trace_id}
-    except PermissionError as e:
-        write_api_audit_log(
-            request=request,
-            api_key=api_key,
-            sql=payload.sql,
-            params=payload.params,
-            db_alias=db_cfg.alias,
-            trace_id=trace_id,
-        )
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
-    except ValueError as e:
-        write_api_audit_log(
-            request=request,
-            api_key=api_key,
-            sql=payload.sql,
-            params=payload.params,
-            db_alias=db_cfg.alias,
-            trace_id=trace_id,
-        )
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        response = _rows_response(rows, trace_id)
+        audit_background = background
+        return response
     except Exception as e:
+        raise skill_http_error(e, "Query")
+    finally:
         write_api_audit_log(
             request=request,
             api_key=api_key,
@@ -77,10 +99,5 @@ async def query_endpoint(
             params=payload.params,
             db_alias=db_cfg.alias,
             trace_id=trace_id,
+            background=audit_background,
         )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Query failed: {str(e)}",
-        )
-
-
@@ -9,54 +9,59 @@ Web API 侧审计：
 
 from __future__ import annotations
 
-import json
 import logging
+import queue
+import threading
+import time
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
-from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Mapping, Optional
 
-from fastapi import Request
+from fastapi import BackgroundTasks, Request
+from sqlalchemy import bindparam, func, select, tuple_
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.auth import ApiKey
-from api.services.models import ApiAuditLog, SessionLocal, init_admin_db
+from api.services.models import ApiAuditLog, engine
+from api.services.settings import load_server_yaml
 
 logger = logging.getLogger(__name__)
 
 
-def _safe_json_dumps(obj: Any) -> str:
-    """序列化 params 为 JSON，对 datetime/UUID/Decimal 等用 str 兜底。"""
-    def default(o: Any) -> Any:
-        if hasattr(o, "isoformat"):
-            return o.isoformat()
-        return str(o)
-    return json.dumps(obj, ensure_ascii=False, default=default)
-
-
 @dataclass
 class ApiAuditConfig:
     enabled: bool = True
     retention_days: int = 30
+    background_writer: bool = True  # False 时不启动后台写入线程，改由响应发送后的 BackgroundTasks 写入
 
 
 def _load_api_audit_config() -> ApiAuditConfig:
-    root = Path(__file__).resolve().parents[2]
-    path = root / "server.yaml"
-    if not path.is_file():
-        return ApiAuditConfig()
-    import yaml
-    with path.open("r", encoding="utf-8") as f:
-        raw = yaml.safe_load(f) or {}
-    ac = raw.get("api_audit") or {}
+    ac = load_server_yaml().get("api_audit") or {}
     return ApiAuditConfig(
         enabled=bool(ac.get("enabled", True)),
         retention_days=int(ac.get("retention_days", 30)),
+        background_writer=bool(ac.get("background_writer", True)),
     )
 
 
 API_AUDIT_CONFIG = _load_api_audit_config()
 
-_last_cleanup_date: Optional[str] = None
+_last_cleanup_date: Optional[date] = None
+
+# 审计记录先进入有界队列，由后台线程批量写入：请求路径上不再等待 SQLite 写锁与 fsync。
+# 队列满时丢弃并告警；写入线程未启动时，调用方给了 BackgroundTasks 就在响应发出后写入，
+# 否则（脚本直接调用、异常分支）同步写入。
+_AUDIT_QUEUE_MAXSIZE = 10_000
+_AUDIT_BATCH_SIZE = 128
+# 收到一批的第一条后最多再等这么久凑批：突发流量下合并为更少的事务，空闲时单条延迟也很小
+_AUDIT_FLUSH_INTERVAL = 0.05
+_audit_queue: "queue.Queue[Optional[dict[str, Any]]]" = queue.Queue(maxsize=_AUDIT_QUEUE_MAXSIZE)
+_audit_writer: Optional[threading.Thread] = None
+
+# 审计写入走 Core：队列里是普通 dict，批量交给驱动 executemany，不经过 ORM 实例化与 flush
+_AUDIT_INSERT = ApiAuditLog.__table__.insert()
+_AUDIT_PRUNE = ApiAuditLog.__table__.delete().where(ApiAuditLog.__table__.c.ts < bindparam("cutoff"))
 
 
 def write_api_audit_log(
@@ -66,59 +71,123 @@ def write_api_audit_log(
     params: Optional[Mapping[str, Any]],
     db_alias: Optional[str],
     trace_id: str,
+    background: Optional[BackgroundTasks] = None,
 ) -> None:
-    """将 API 审计记录写入数据库（不写文件）。"""
+    """
+    构造 API 审计记录并交给后台线程写入数据库（不写文件）。
+    记录在此处从 request 中取值成 dict，之后的写入不再引用 request。
+    """
     if not API_AUDIT_CONFIG.enabled:
         return
 
-    init_admin_db()
-    now = datetime.now(timezone.utc)
-    db = SessionLocal()
     try:
-        params_str = _safe_json_dumps(dict(params or {}))
-        row = ApiAuditLog(
-            ts=now,
-            trace_id=trace_id or "",
-            path=request.url.path,
-            method=request.method,
-            client_ip=request.client.host if request.client else None,
-            api_key_name=api_key.name if api_key else None,
-            permission_level=api_key.permission_level if api_key else None,
-            db_alias=db_alias,
-            sql=sql,
-            params=params_str,
-        )
-        db.add(row)
-        db.commit()
-        _prune_old_audit_logs_if_due()
+        row = {
+            "ts": datetime.now(timezone.utc),
+            "trace_id": trace_id or "",
+            "path": request.url.path,
+            "method": request.method,
+            "client_ip": request.client.host if request.client else None,
+            "api_key_name": api_key.name if api_key else None,
+            "permission_level": api_key.permission_level if api_key else None,
+            "db_alias": db_alias,
+            "sql": sql,
+            "params": dict(params) if params else None,
+        }
+    except Exception as e:
+        logger.exception("write_api_audit_log failed: %s", e)
+        return
+    if _audit_writer is None:
+        if background is not None:
+            background.add_task(_write_audit_batch, [row])
+        else:
+            _write_audit_batch([row])
+        return
+    try:
+        _audit_queue.put_nowait(row)
+    except queue.Full:
+        logger.warning("api audit queue full, dropping record trace_id=%s", row["trace_id"])
+
+
+def _write_audit_batch(rows: list[dict[str, Any]]) -> None:
+    """一个事务内 executemany 写入一批审计记录，并按需清理过期记录。"""
+    try:
+        with engine.begin() as conn:
+            conn.execute(_AUDIT_INSERT, rows)
+            _prune_old_audit_logs_if_due(conn, rows[-1]["ts"])
     except Exception as e:
         logger.exception("write_api_audit_log failed: %s", e)
-    finally:
-        db.close()
 
 
-def _prune_old_audit_logs_if_due() -> None:
-    """按 retention_days 删除过期审计记录，最多每天执行一次。"""
+def _audit_writer_loop() -> None:
+    """
+    后台线程：阻塞等待第一条记录，之后在 _AUDIT_FLUSH_INTERVAL 内继续收集，
+    满 _AUDIT_BATCH_SIZE 条或超时即写入；收到 None 时写完当前批后退出。
+    """
+    stopping = False
+    while not stopping:
+        item = _audit_queue.get()
+        deadline = time.monotonic() + _AUDIT_FLUSH_INTERVAL
+        rows: list[dict[str, Any]] = []
+        while True:
+            if item is None:
+                stopping = True
+                break
+            rows.append(item)
+            if len(rows) >= _AUDIT_BATCH_SIZE:
+                break
+            remaining = deadline - time.monotonic()
+            try:
+                item = _audit_queue.get(timeout=remaining) if remaining > 0 else _audit_queue.get_nowait()
+            except queue.Empty:
+                break
+        if rows:
+            _write_audit_batch(rows)
+
+
+def start_audit_writer() -> None:
+    """启动后台审计写入线程（应用启动时由 lifespan 调用）。"""
+    global _audit_writer
+    if _audit_writer is not None or not API_AUDIT_CONFIG.background_writer:
+        return
+    _audit_writer = threading.Thread(target=_audit_writer_loop, name="api-audit-writer", daemon=True)
+    _audit_writer.start()
+
+
+def stop_audit_writer(timeout: float = 10.0) -> None:
+    """停止写入线程并落盘队列中剩余的记录（应用关闭时由 lifespan 调用）。"""
+    global _audit_writer
+    writer = _audit_writer
+    if writer is None:
+        return
+    # 先切回同步写入，再发送结束标记，之后到达的记录不会滞留在队列里
+    _audit_writer = None
+    _audit_queue.put(None)
+    writer.join(timeout)
+    rest: list[dict[str, Any]] = []
+    while True:
+        try:
+            item = _audit_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is not None:
+            rest.append(item)
+    if rest:
+        _write_audit_batch(rest)
+
+
+def _prune_old_audit_logs_if_due(conn: Connection, now: datetime) -> None:
+    """按 retention_days 删除过期审计记录，最多每天执行一次；now 取自本批最新记录的时间。"""
     global _last_cleanup_date
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    today = now.date()
     if _last_cleanup_date == today:
         return
     _last_cleanup_date = today
-    cutoff = datetime.now(timezone.utc) - timedelta(days=API_AUDIT_CONFIG.retention_days)
-    db = SessionLocal()
-    try:
-        db.query(ApiAuditLog).filter(ApiAuditLog.ts < cutoff).delete(synchronize_session=False)
-        db.commit()
-    finally:
-        db.close()
+    conn.execute(_AUDIT_PRUNE, {"cutoff": now - timedelta(days=API_AUDIT_CONFIG.retention_days)})
 
 
 def _row_to_entry(row: ApiAuditLog) -> dict[str, Any]:
     ts = row.ts
-    try:
-        params = json.loads(row.params) if row.params else {}
-    except (TypeError, ValueError):
-        params = {}
+    params = row.params if isinstance(row.params, dict) else {}
     return {
         "ts": ts.isoformat() if ts else "",
         "trace_id": row.trace_id or "",
@@ -133,35 +202,39 @@ def _row_to_entry(row: ApiAuditLog) -> dict[str, Any]:
     }
 
 
-def list_audit_logs(
-    db_session: Any,
+async def list_audit_logs(
+    db_session: AsyncSession,
     db_alias: Optional[str] = None,
     api_key_name: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     page: int = 1,
     per_page: int = 20,
-) -> tuple[list[dict[str, Any]], int]:
+    cursor: Optional[tuple[datetime, int]] = None,
+    count_total: bool = True,
+) -> tuple[list[dict[str, Any]], Optional[int], Optional[tuple[datetime, int]]]:
     """
-    从数据库分页查询 API 审计日志。
+    从数据库分页查询 API 审计日志（异步会话），按 (ts, id) 倒序。
     支持按 db_alias、api_key_name、日志创建日期 date_from/date_to（YYYY-MM-DD）筛选。
     api_key_name 为 "__unnamed" 时表示筛选无备注名的 key（api_key_name 为空）。
-    返回 (当前页条目列表, 总条数)。
+    传入 cursor（上一页最后一条的 (ts, id)）时按键集翻页，不再 OFFSET 扫描前面的行；
+    此时若 count_total 为 False 则不统计总数（返回 None）。
+    返回 (当前页条目列表, 总条数, 下一页 cursor)。
     """
-    qs = db_session.query(ApiAuditLog)
+    conds = []
     db_match = (db_alias or "").strip()
     if db_match:
-        qs = qs.filter(ApiAuditLog.db_alias == db_match)
+        conds.append(ApiAuditLog.db_alias == db_match)
     key_match = (api_key_name or "").strip()
     if key_match == "__unnamed":
-        qs = qs.filter((ApiAuditLog.api_key_name == "") | (ApiAuditLog.api_key_name.is_(None)))
+        conds.append((ApiAuditLog.api_key_name == "") | (ApiAuditLog.api_key_name.is_(None)))
     elif key_match:
-        qs = qs.filter(ApiAuditLog.api_key_name == key_match)
+        conds.append(ApiAuditLog.api_key_name == key_match)
     date_from_s = (date_from or "").strip()
     if date_from_s:
         try:
             start = datetime.strptime(date_from_s, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-            qs = qs.filter(ApiAuditLog.ts >= start)
+            conds.append(ApiAuditLog.ts >= start)
         except ValueError:
             pass
     date_to_s = (date_to or "").strip()
@@ -170,14 +243,38 @@ def list_audit_logs(
             end = datetime.strptime(date_to_s, "%Y-%m-%d").replace(
                 hour=23, minute=59, second=59, microsecond=999999, tzinfo=timezone.utc
             )
-            qs = qs.filter(ApiAuditLog.ts <= end)
+            conds.append(ApiAuditLog.ts <= end)
         except ValueError:
             pass
-    total = qs.count()
-    qs = qs.order_by(ApiAuditLog.ts.desc()).offset((page - 1) * per_page).limit(per_page)
-    rows = qs.all()
+    stmt = select(ApiAuditLog).order_by(ApiAuditLog.ts.desc(), ApiAuditLog.id.desc()).limit(per_page)
+    if cursor is not None:
+        stmt = stmt.where(*conds, tuple_(ApiAuditLog.ts, ApiAuditLog.id) < tuple_(*cursor))
+        rows = (await db_session.scalars(stmt)).all()
+        total = None
+        if count_total:
+            total = await db_session.scalar(select(func.count()).select_from(ApiAuditLog).where(*conds))
+    else:
+        # 总数通过 COUNT(*) OVER () 随当前页一并返回；页码越界时当前页为空，再单独统计
+        result = await db_session.execute(
+            stmt.add_columns(func.count().over().label("total")).where(*conds).offset((page - 1) * per_page)
+        )
+        pairs = result.all()
+        rows = [r[0] for r in pairs]
+        if pairs:
+            total = pairs[0].total
+        elif page > 1:
+            total = await db_session.scalar(select(func.count()).select_from(ApiAuditLog).where(*conds))
+        else:
+            total = 0
+    next_cursor = (rows[-1].ts, rows[-1].id) if len(rows) == per_page else None
     entries = [_row_to_entry(r) for r in rows]
-    return entries, total
+    return entries, total, next_cursor
 
 
-__all__ = ["write_api_audit_log", "API_AUDIT_CONFIG", "list_audit_logs"]
+__all__ = [
+    "write_api_audit_log",
+    "API_AUDIT_CONFIG",
+    "list_audit_logs",
+    "start_audit_writer",
+    "stop_audit_writer",
+]
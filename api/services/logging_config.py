@@ -9,16 +9,11 @@ import logging.handlers
 from pathlib import Path
 from typing import Any, Mapping, Optional
 
+from api.services.settings import load_server_yaml
+
 
 def _load_logging_config() -> Mapping[str, Any]:
-    root = Path(__file__).resolve().parents[2]
-    path = root / "server.yaml"
-    if not path.is_file():
-        return {}
-    import yaml
-    with path.open("r", encoding="utf-8") as f:
-        raw = yaml.safe_load(f) or {}
-    return raw.get("logging") or {}
+    return load_server_yaml().get("logging") or {}
 
 
 def setup_logging() -> None:
@@ -8,43 +8,182 @@
 
 from __future__ import annotations
 
+import json
 import os
+import threading
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
+from typing import Any, Iterator, Optional
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, create_engine, text
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+import orjson
+
+from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text, create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, relationship, sessionmaker
+
+from api.services.settings import BASE_DIR, load_server_yaml
 
 
 def _get_admin_db_path() -> Path:
     """admin.db 路径：环境变量 ADMIN_DB_PATH > server.yaml admin_db.path > 默认项目根/admin.db。"""
     if os.environ.get("ADMIN_DB_PATH"):
         return Path(os.environ["ADMIN_DB_PATH"]).resolve()
-    base = Path(__file__).resolve().parents[2]
-    server_path = base / "server.yaml"
-    if server_path.is_file():
-        import yaml
-        with server_path.open("r", encoding="utf-8") as f:
-            raw = yaml.safe_load(f) or {}
-        path_val = (raw.get("admin_db") or {}).get("path")
-        if path_val:
-            p = Path(path_val)
-            if not p.is_absolute():
-                p = (base / p).resolve()
-            return p
-    return base / "admin.db"
-
-
-BASE_DIR = Path(__file__).resolve().parents[2]
+    path_val = (load_server_yaml().get("admin_db") or {}).get("path")
+    if path_val:
+        p = Path(path_val)
+        if not p.is_absolute():
+            p = (BASE_DIR / p).resolve()
+        return p
+    return BASE_DIR / "admin.db"
+
+
 ADMIN_DB_PATH = _get_admin_db_path()
 
 DATABASE_URL = f"sqlite:///{ADMIN_DB_PATH}"
 
-engine = create_engine(DATABASE_URL, future=True)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+# 连接池参数：两个引擎共用；取连接最多等待 _POOL_TIMEOUT 秒，池满时快速失败而不是无限排队
+_POOL_SIZE = 20
+_MAX_OVERFLOW = 10
+_POOL_TIMEOUT = 2.0
+# 取到连接后等待 SQLite 文件写锁的秒数（sqlite3/aiosqlite 的 timeout，即 busy_timeout），
+# 审计写入线程与管理端写操作偶有重叠时排队而不是直接报 database is locked
+_SQLITE_BUSY_TIMEOUT = 30
+
+
+def _json_default(o: Any) -> Any:
+    if hasattr(o, "isoformat"):
+        return o.isoformat()
+    return str(o)
+
+
+def _json_serializer(obj: Any) -> str:
+    """
+    JSON 列的序列化函数，对 datetime/UUID/Decimal 等用 str 兜底。
+    优先用 orjson（原生支持 datetime/UUID）；超出 64 位的整数等 orjson 不接受的值退回标准库。
+    """
+    try:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    except TypeError:
+        return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+
+def _json_deserializer(raw: str) -> Any:
+    """JSON 列的反序列化函数；历史数据中无法解析的值读作 None，不影响整页查询。"""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+# 每个请求从连接池取出已有连接，避免频繁新建；commit 后不过期对象属性，免去再次 SELECT
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=_POOL_SIZE,
+    max_overflow=_MAX_OVERFLOW,
+    pool_timeout=_POOL_TIMEOUT,
+    pool_recycle=1800,
+    pool_pre_ping=False,
+    connect_args={"check_same_thread": False, "timeout": _SQLITE_BUSY_TIMEOUT},
+    json_serializer=_json_serializer,
+    json_deserializer=_json_deserializer,
+    future=True,
+)
+SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False, future=True)
+
+# 管理后台路由使用异步会话（aiosqlite），连接只在 await 期间占用，不随线程池线程一起被整段请求持有
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{ADMIN_DB_PATH}"
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=_POOL_SIZE,
+    max_overflow=_MAX_OVERFLOW,
+    pool_timeout=_POOL_TIMEOUT,
+    pool_recycle=1800,
+    pool_pre_ping=False,
+    connect_args={"timeout": _SQLITE_BUSY_TIMEOUT},
+    json_serializer=_json_serializer,
+    json_deserializer=_json_deserializer,
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# admin.db 每个请求都会读（鉴权、库配置）且持续写入审计：WAL 让读写互不阻塞，
+# synchronous=NORMAL 在 WAL 下只在检查点 fsync，掉电最多丢最近几次提交，对审计日志可接受
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-20000",
+)
+
+
+def _apply_sqlite_pragmas(dbapi_conn, _record) -> None:
+    cursor = dbapi_conn.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _optimize_on_close(dbapi_conn, _record) -> None:
+    """连接真正关闭（回收、dispose）前让 SQLite 按需刷新查询规划统计。"""
+    try:
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute("PRAGMA optimize")
+        finally:
+            cursor.close()
+    except Exception:
+        # 关闭路径上不因统计刷新失败影响连接释放
+        pass
+
+
+event.listen(engine, "connect", _apply_sqlite_pragmas)
+event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+event.listen(engine, "close", _optimize_on_close)
+event.listen(async_engine.sync_engine, "close", _optimize_on_close)
+
+
+def get_session() -> Iterator[Session]:
+    """FastAPI 依赖：每个请求一个 Session，供鉴权与配置解析使用，请求结束归还连接池（路由可在用完后提前 close）。"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def warm_admin_pool() -> None:
+    """启动时同时签出 pool_size 个连接再归还，使首批请求直接复用已打开的连接。"""
+    conns = []
+    try:
+        for _ in range(_POOL_SIZE):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+async def warm_admin_pool_async() -> None:
+    """warm_admin_pool 的异步引擎版本。"""
+    conns = []
+    try:
+        for _ in range(_POOL_SIZE):
+            conn = await async_engine.connect()
+            conns.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            await conn.close()
+
 
 Base = declarative_base()
 
+# created_at 等列的默认值：直接绑定 datetime.now(timezone.utc)，不再每次经过 lambda
+_utcnow = partial(datetime.now, timezone.utc)
+
 
 class Database(Base):
     """API 模式：后台添加的数据库连接配置，可分配给多个 API Key。"""
@@ -60,7 +199,7 @@ class Database(Base):
     password = Column(String(256), nullable=True)
     database = Column(String(256), nullable=True)  # 库名或 sqlite 文件路径
     permission_level = Column(String(16), nullable=False, default="readonly")
-    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=_utcnow)
 
     key_assignments = relationship(
         "ApiKeyDatabase",
@@ -83,18 +222,18 @@ class ApiKeyDatabase(Base):
 
 
 class ApiKey(Base):
-    """API Key：可访问数据库列表由 assignments 决定，每库单独权限。只存 raw_key，prefix 由 raw_key 派生。"""
+    """API Key：可访问数据库列表由 assignments 决定，每库单独权限。明文 key 不入库，只存哈希与脱敏提示。"""
 
     __tablename__ = "api_keys"
 
     id = Column(Integer, primary_key=True, index=True)
     key_hash = Column(String(128), nullable=False)
-    raw_key = Column(String(80), nullable=False)  # 完整 key
+    key_hint = Column(String(32), nullable=True)  # 明文 key 前 8 位 + **** + 后 4 位，仅用于展示
     permission_level = Column(String(16), nullable=False, default="readonly")
     db_config_ref = Column(String(100), nullable=True)  # 可选默认库别名
     name = Column(String(100), nullable=True)  # 可选备注，便于管理
     enabled = Column(Boolean, nullable=False, default=True)
-    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=_utcnow)
 
     assignments = relationship(
         "ApiKeyDatabase",
@@ -104,8 +243,24 @@ class ApiKey(Base):
 
     @property
     def prefix(self) -> str:
-        """由 raw_key 前 8 位派生，用于展示。"""
-        return (self.raw_key or "")[:8]
+        """明文 key 前 8 位，用于展示。"""
+        return (self.key_hint or "")[:8]
+
+    @property
+    def masked_key(self) -> str:
+        """脱敏展示：前 6 位 + **** + 后 4 位。"""
+        return mask_key_hint(self.key_hint)
+
+
+def make_key_hint(raw_key: str) -> str:
+    """由明文 key 生成可入库的脱敏提示。"""
+    return raw_key[:8] + "****" + raw_key[-4:]
+
+
+def mask_key_hint(hint: Optional[str]) -> str:
+    """key_hint 的页面展示形式：前 6 位 + **** + 后 4 位。"""
+    hint = hint or ""
+    return hint[:6] + "****" + hint[-4:] if len(hint) > 12 else hint[:6] + "****"
 
 
 class AdminUser(Base):
@@ -116,16 +271,23 @@ class AdminUser(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(64), unique=True, nullable=False, index=True)
     password_hash = Column(String(256), nullable=False)
-    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=_utcnow)
 
 
 class ApiAuditLog(Base):
     """Web API 审计日志（/query、/execute 等请求），仅存数据库。"""
 
     __tablename__ = "api_audit_logs"
+    # 列表页按 ts 倒序分页：无筛选时走 ts 打头的复合索引（也覆盖了原先单列 ts 索引的用途）；
+    # 按库别名或 Key 名筛选时走 (列, ts) 索引，等值定位后按 ts 顺序读取，无需扫描再排序
+    __table_args__ = (
+        Index("ix_audit_ts_alias_key", "ts", "db_alias", "api_key_name"),
+        Index("ix_audit_key_ts", "api_key_name", "ts"),
+        Index("ix_audit_db_ts", "db_alias", "ts"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    ts = Column(DateTime(timezone=True), nullable=False, index=True)
+    ts = Column(DateTime(timezone=True), nullable=False)
     trace_id = Column(String(64), nullable=False)
     path = Column(String(512), nullable=False)
     method = Column(String(16), nullable=True)
@@ -134,21 +296,33 @@ class ApiAuditLog(Base):
     permission_level = Column(String(16), nullable=True)
     db_alias = Column(String(100), nullable=True)
     sql = Column(Text, nullable=True)
-    params = Column(Text, nullable=True)  # JSON 字符串
+    # SQLite 中仍以 TEXT 存储，与历史数据兼容；由引擎的 json_serializer 在写入线程里编码，读取时直接得到 dict
+    params = Column(JSON(none_as_null=True), nullable=True)
+
+
+_COLUMN_EXISTS = text("SELECT 1 FROM pragma_table_info(:table) WHERE name = :column")
 
 
 def _ensure_column(conn, table: str, column: str, col_def: str) -> None:
-    r = conn.execute(text(f"SELECT 1 FROM pragma_table_info({repr(table)}) WHERE name = {repr(column)}"))
+    r = conn.execute(_COLUMN_EXISTS, {"table": table, "column": column})
     if r.fetchone() is None:
         conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {col_def}"))
         conn.commit()
 
 
+def _ensure_index(conn, name: str, table: str, columns: str, unique: bool = False) -> None:
+    """补建索引（旧库可能缺失 create_all 不会补建的索引）。"""
+    unique_sql = "UNIQUE " if unique else ""
+    conn.execute(text(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+    conn.commit()
+
+
 def _migrate_api_keys_drop_prefix(conn) -> None:
     """移除 prefix 列，只保留 raw_key。无 raw_key 的旧数据不迁移。"""
     r = conn.execute(text("SELECT 1 FROM pragma_table_info('api_keys') WHERE name = 'prefix'"))
     if r.fetchone() is None:
         return
+    _ensure_column(conn, "api_keys", "raw_key", "VARCHAR(80)")
     conn.execute(text("""
         CREATE TABLE api_keys_new (
             id INTEGER NOT NULL PRIMARY KEY,
@@ -172,6 +346,34 @@ def _migrate_api_keys_drop_prefix(conn) -> None:
     conn.commit()
 
 
+def _migrate_api_keys_drop_raw_key(conn) -> None:
+    """移除明文 raw_key 列，改存脱敏提示 key_hint；已有 key 的哈希不变，继续可用。"""
+    r = conn.execute(text("SELECT 1 FROM pragma_table_info('api_keys') WHERE name = 'raw_key'"))
+    if r.fetchone() is None:
+        return
+    conn.execute(text("""
+        CREATE TABLE api_keys_new (
+            id INTEGER NOT NULL PRIMARY KEY,
+            key_hash VARCHAR(128) NOT NULL,
+            key_hint VARCHAR(32),
+            permission_level VARCHAR(16) NOT NULL DEFAULT 'readonly',
+            db_config_ref VARCHAR(100),
+            name VARCHAR(100),
+            enabled BOOLEAN NOT NULL DEFAULT 1,
+            created_at DATETIME
+        )
+    """))
+    conn.execute(text("""
+        INSERT INTO api_keys_new (id, key_hash, key_hint, permission_level, db_config_ref, name, enabled, created_at)
+        SELECT id, key_hash, substr(raw_key, 1, 8) || '****' || substr(raw_key, -4),
+               permission_level, db_config_ref, name, enabled, created_at
+        FROM api_keys
+    """))
+    conn.execute(text("DROP TABLE api_keys"))
+    conn.execute(text("ALTER TABLE api_keys_new RENAME TO api_keys"))
+    conn.commit()
+
+
 def _migrate_api_keys_drop_account_id(conn) -> None:
     """若 api_keys 存在 account_id 列则用建新表方式移除（避免 FK 导致 DROP COLUMN 失败）。"""
     r = conn.execute(text("SELECT 1 FROM pragma_table_info('api_keys') WHERE name = 'account_id'"))
@@ -198,18 +400,67 @@ def _migrate_api_keys_drop_account_id(conn) -> None:
     conn.commit()
 
 
+# 建表与迁移在进程内只需成功执行一次（应用启动时由 lifespan 触发），之后调用直接返回
+_admin_db_ready = False
+_admin_db_lock = threading.Lock()
+
+# admin.db 的表结构版本，记录在 PRAGMA user_version；已是该版本时跳过全部建表/迁移探测。
+# 新增列、索引或迁移时须加 1，否则已升级过的库不会再执行新的迁移
+_SCHEMA_VERSION = 1
+
+
 def init_admin_db() -> None:
-    """创建管理后台所需的表。"""
+    """创建管理后台所需的表并执行就地迁移；进程内仅首次调用真正执行。"""
+    global _admin_db_ready
+    if _admin_db_ready:
+        return
+    with _admin_db_lock:
+        if _admin_db_ready:
+            return
+        _create_and_migrate()
+        _admin_db_ready = True
+
+
+def _create_and_migrate() -> None:
+    with engine.connect() as conn:
+        if conn.execute(text("PRAGMA user_version")).scalar() >= _SCHEMA_VERSION:
+            return
     Base.metadata.create_all(bind=engine)
     with engine.connect() as conn:
         _ensure_column(conn, "api_keys", "permission_level", "VARCHAR(16) NOT NULL DEFAULT 'readonly'")
         _ensure_column(conn, "api_keys", "db_config_ref", "VARCHAR(100)")
-        _ensure_column(conn, "api_keys", "raw_key", "VARCHAR(80)")
         _ensure_column(conn, "api_keys", "name", "VARCHAR(100)")
-        _ensure_column(conn, "api_keys", "enabled", "BOOLEAN NOT NULL DEFAULT 1")
         _migrate_api_keys_drop_account_id(conn)
         _migrate_api_keys_drop_prefix(conn)
+        _ensure_column(conn, "api_keys", "enabled", "BOOLEAN NOT NULL DEFAULT 1")
+        _migrate_api_keys_drop_raw_key(conn)
         _ensure_column(conn, "api_key_databases", "permission_level", "VARCHAR(16) NOT NULL DEFAULT 'readonly'")
+        _ensure_index(conn, "ix_admin_users_username", "admin_users", "username", unique=True)
+        _ensure_index(conn, "ix_audit_ts_alias_key", "api_audit_logs", "ts, db_alias, api_key_name")
+        _ensure_index(conn, "ix_audit_key_ts", "api_audit_logs", "api_key_name, ts")
+        _ensure_index(conn, "ix_audit_db_ts", "api_audit_logs", "db_alias, ts")
+        conn.execute(text("DROP INDEX IF EXISTS ix_api_audit_logs_ts"))
+        conn.commit()
+        # 迁移/建索引后补一次统计（0x10002：对所有表都检查；analysis_limit 限制每个索引的采样行数）
+        conn.execute(text("PRAGMA analysis_limit=1000"))
+        conn.execute(text("PRAGMA optimize(0x10002)"))
+        conn.execute(text(f"PRAGMA user_version = {_SCHEMA_VERSION}"))
+        conn.commit()
 
 
-__all__ = ["ApiKey", "ApiKeyDatabase", "AdminUser", "ApiAuditLog", "Database", "SessionLocal", "init_admin_db"]
+__all__ = [
+    "ApiKey",
+    "ApiKeyDatabase",
+    "AdminUser",
+    "ApiAuditLog",
+    "AsyncSessionLocal",
+    "Database",
+    "SessionLocal",
+    "async_engine",
+    "get_session",
+    "init_admin_db",
+    "make_key_hint",
+    "mask_key_hint",
+    "warm_admin_pool",
+    "warm_admin_pool_async",
+]
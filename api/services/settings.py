@@ -0,0 +1,30 @@
+"""
+后台服务配置：server.yaml 的统一读取入口。
+
+session_secret、admin_db、logging、api_audit 等各段都从这里取，
+整个进程只解析一次 YAML。
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Mapping
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+SERVER_YAML_PATH = BASE_DIR / "server.yaml"
+
+
+@lru_cache(maxsize=1)
+def load_server_yaml() -> Mapping[str, Any]:
+    """读取并缓存项目根目录下的 server.yaml；文件不存在时返回空字典。"""
+    if not SERVER_YAML_PATH.is_file():
+        return {}
+    import yaml
+    # 优先使用 libyaml 的 C 实现，未编译 libyaml 时退回纯 Python 的 SafeLoader，两者安全语义一致
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with SERVER_YAML_PATH.open("r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=loader) or {}
+
+
+__all__ = ["BASE_DIR", "SERVER_YAML_PATH", "load_server_yaml"]
@@ -6,15 +6,62 @@ Skill 侧的 API 模式 HTTP 客户端。
 
 from __future__ import annotations
 
+import asyncio
+import base64
 import json
 import logging
-from typing import Any, Dict, List, Mapping, Optional
-from urllib.error import HTTPError
-from urllib.parse import urljoin
-from urllib.request import Request, urlopen
+import threading
+import time
+from http.client import HTTPConnection, HTTPException, HTTPResponse, HTTPSConnection, RemoteDisconnected
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+from urllib.parse import unquote, urlencode, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+try:
+    import orjson
+except ImportError:  # Skill 可脱离服务端依赖单独使用，未安装 orjson 时用标准库
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # 未安装 ijson 时 call_query_iter 退化为整体读取后逐行产出
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
+_TIMEOUT = 30
+# 仅对 GET 在网关类错误时重试（POST /execute 不幂等）；退避 _RETRY_BACKOFF * 2^n 秒
+_GET_RETRY_STATUSES = frozenset((502, 503, 504))
+_GET_RETRIES = 2
+_RETRY_BACKOFF = 0.2
+# 服务端关闭了空闲的长连接时，复用连接发出的请求会失败，此时换新连接重发一次。
+# 发送阶段失败时服务端不可能收到完整请求，任何方法都可重发；等待响应时失败则服务端可能已执行，只重发 GET
+_STALE_CONNECTION_ERRORS = (RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# 与 urllib 一致最多跟随 10 次重定向；GET 跟随全部 30x，POST 在 303 时改为 GET，其余 30x 原样重发请求体
+# （服务端返回重定向即未执行该请求）。跳转到其他主机时不再携带 Authorization
+_REDIRECT_STATUSES = frozenset((301, 302, 303, 307, 308))
+_MAX_REDIRECTS = 10
+
+# 每个线程按 (scheme, host:port) 复用一条 keep-alive 连接，连续调用免去重复的 TCP/TLS 握手
+_local = threading.local()
+
+
+def _dumps(body: dict) -> bytes:
+    """请求体编码：优先 orjson（直接得到 bytes），其不支持的值（如超 64 位整数）退回标准库。"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(body)
+        except TypeError:
+            pass
+    return json.dumps(body).encode("utf-8")
+
+
+def _as_json_params(params: Optional[Mapping[str, Any]]) -> dict:
+    """请求体中的 params：调用方传入的 dict 只读不改，直接使用；其他 Mapping 才复制为 dict。"""
+    if isinstance(params, dict):
+        return params
+    return dict(params) if params else {}
+
 
 class ApiClientError(Exception):
     """API 请求失败（4xx/5xx 或网络错误），detail 可含服务端返回信息。"""
@@ -24,6 +71,147 @@ class ApiClientError(Exception):
         super().__init__(message)
 
 
+def _new_connection(scheme: str, netloc: str) -> tuple[HTTPConnection, Optional[dict]]:
+    """
+    新建到 netloc 的连接，与 urllib 一样遵循 HTTP_PROXY/HTTPS_PROXY/NO_PROXY 环境变量。
+    返回 (连接, 经 HTTP 代理转发时每个请求需附加的请求头)；直连或经 CONNECT 隧道访问 HTTPS 时后者为 None。
+    """
+    cls = HTTPSConnection if scheme == "https" else HTTPConnection
+    proxy = getproxies().get(scheme)
+    if not proxy or proxy_bypass(urlsplit(f"//{netloc}").hostname or netloc):
+        return cls(netloc, timeout=_TIMEOUT), None
+    p = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    proxy_headers = {}
+    if p.username:
+        cred = f"{unquote(p.username)}:{unquote(p.password or '')}"
+        proxy_headers["Proxy-Authorization"] = "Basic " + base64.b64encode(cred.encode("utf-8")).decode("ascii")
+    proxy_netloc = p.netloc.rpartition("@")[2]
+    if scheme == "https":
+        conn = HTTPSConnection(proxy_netloc, timeout=_TIMEOUT)
+        conn.set_tunnel(netloc, headers=proxy_headers)
+        return conn, None
+    return HTTPConnection(proxy_netloc, timeout=_TIMEOUT), proxy_headers
+
+
+def _get_connection(scheme: str, netloc: str) -> tuple[HTTPConnection, Optional[dict], bool]:
+    """返回 (连接, 代理请求头, 是否为复用的已有连接)。"""
+    conns: Optional[dict] = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    entry = conns.get((scheme, netloc))
+    if entry is not None:
+        return entry[0], entry[1], True
+    conn, proxy_headers = conns[(scheme, netloc)] = _new_connection(scheme, netloc)
+    return conn, proxy_headers, False
+
+
+def _drop_connection(scheme: str, netloc: str) -> None:
+    entry = getattr(_local, "conns", {}).pop((scheme, netloc), None)
+    if entry is not None:
+        entry[0].close()
+
+
+def _open_once(scheme: str, netloc: str, method: str, target: str, data: Optional[bytes], headers: dict) -> HTTPResponse:
+    """在复用连接上发送一次请求，返回尚未读取响应体的响应；复用连接已被服务端关闭时按需换新连接重发。"""
+    while True:
+        conn, proxy_headers, reused = _get_connection(scheme, netloc)
+        req_target, req_headers = target, headers
+        if proxy_headers is not None:
+            # 经 HTTP 代理转发：请求行使用绝对 URL
+            req_target = f"{scheme}://{netloc}{target}"
+            req_headers = {**headers, **proxy_headers}
+        try:
+            conn.request(method, req_target, body=data, headers=req_headers)
+        except _STALE_CONNECTION_ERRORS:
+            _drop_connection(scheme, netloc)
+            if reused:
+                continue
+            raise
+        except (OSError, HTTPException):
+            _drop_connection(scheme, netloc)
+            raise
+        try:
+            return conn.getresponse()
+        except _STALE_CONNECTION_ERRORS as e:
+            _drop_connection(scheme, netloc)
+            if method == "GET":
+                if reused:
+                    continue
+                raise
+            raise ApiClientError(
+                f"connection closed before the response to {method} {target} arrived; "
+                "the request may already have been processed and was not resent"
+            ) from e
+        except (OSError, HTTPException):
+            _drop_connection(scheme, netloc)
+            raise
+
+
+def _open_response(
+    scheme: str, netloc: str, method: str, target: str, data: Optional[bytes], headers: dict
+) -> tuple[HTTPResponse, str, str]:
+    """发送请求并跟随重定向，返回 (尚未读取响应体的响应, 最终的 scheme, 最终的 netloc)。"""
+    for _ in range(_MAX_REDIRECTS):
+        resp = _open_once(scheme, netloc, method, target, data, headers)
+        location = resp.getheader("Location") if resp.status in _REDIRECT_STATUSES else None
+        if not location:
+            return resp, scheme, netloc
+        # 读完重定向响应体，连接才能继续复用
+        try:
+            resp.read()
+        except (OSError, HTTPException):
+            _drop_connection(scheme, netloc)
+            raise
+        if resp.will_close:
+            _drop_connection(scheme, netloc)
+        url = urlsplit(urljoin(f"{scheme}://{netloc}{target}", location))
+        if url.hostname != urlsplit(f"//{netloc}").hostname:
+            headers = {k: v for k, v in headers.items() if k != "Authorization"}
+        if resp.status == 303 and method != "GET":
+            method, data = "GET", None
+        scheme, netloc = url.scheme, url.netloc
+        target = (url.path or "/") + (f"?{url.query}" if url.query else "")
+    raise ApiClientError(f"API request failed: too many redirects (last: {scheme}://{netloc}{target})")
+
+
+def _send(scheme: str, netloc: str, method: str, target: str, data: Optional[bytes], headers: dict) -> tuple[int, str, bytes]:
+    """发送请求并读完响应体。"""
+    resp, scheme, netloc = _open_response(scheme, netloc, method, target, data, headers)
+    try:
+        raw = resp.read()
+    except (OSError, HTTPException):
+        _drop_connection(scheme, netloc)
+        raise
+    if resp.will_close:
+        _drop_connection(scheme, netloc)
+    return resp.status, resp.reason, raw
+
+
+def _prepare(base_url: str, path: str, token: str) -> tuple[str, str, str, dict]:
+    """拼出 (scheme, netloc, 请求目标, 请求头)。"""
+    url = urlsplit(urljoin(base_url.rstrip("/") + "/", path.lstrip("/")))
+    target = url.path or "/"
+    if url.query:
+        target += "?" + url.query
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+    }
+    return url.scheme, url.netloc, target, headers
+
+
+def _raise_for_status(status: int, reason: str, raw: bytes) -> None:
+    body_str: Optional[str] = raw.decode("utf-8", errors="replace") or None
+    msg = f"API request failed: {status} {reason}"
+    if body_str:
+        try:
+            detail = json.loads(body_str).get("detail", body_str)
+            msg += f" — {detail}"
+        except Exception:
+            msg += f" — {body_str[:500]}"
+    raise ApiClientError(msg, status_code=status, body=body_str)
+
+
 def _request(
     base_url: str,
     path: str,
@@ -31,30 +219,20 @@ def _request(
     method: str = "GET",
     body: Optional[dict] = None,
 ) -> dict:
-    url = urljoin(base_url.rstrip("/") + "/", path.lstrip("/"))
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    data = json.dumps(body).encode("utf-8") if body else None
-    req = Request(url, data=data, headers=headers, method=method)
-    try:
-        with urlopen(req, timeout=30) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except HTTPError as e:
-        body_str: Optional[str] = None
-        try:
-            body_str = e.read().decode("utf-8", errors="replace")
-        except Exception:
-            pass
-        msg = f"API request failed: {e.code} {e.reason}"
-        if body_str:
-            try:
-                detail = json.loads(body_str).get("detail", body_str)
-                msg += f" — {detail}"
-            except Exception:
-                msg += f" — {body_str[:500]}"
-        raise ApiClientError(msg, status_code=e.code, body=body_str) from e
+    scheme, netloc, target, headers = _prepare(base_url, path, token)
+    data = _dumps(body) if body else None
+    attempt = 0
+    while True:
+        status, reason, raw = _send(scheme, netloc, method, target, data, headers)
+        if method == "GET" and status in _GET_RETRY_STATUSES and attempt < _GET_RETRIES:
+            time.sleep(_RETRY_BACKOFF * (2 ** attempt))
+            attempt += 1
+            continue
+        break
+    if status >= 400:
+        _raise_for_status(status, reason, raw)
+    # 响应解码保留标准库：orjson 会把超出 64 位的整数（如 NUMERIC 主键）静默转成 float
+    return json.loads(raw)
 
 
 def call_list_databases(api_url: str, api_token: str) -> List[Dict[str, Any]]:
@@ -70,12 +248,8 @@ def call_schema(
     db_alias: Optional[str] = None,
 ) -> Dict[str, Any]:
     """调用 GET /schema，返回 schema 数据。"""
-    params = []
-    if table:
-        params.append(f"table={table}")
-    if db_alias:
-        params.append(f"db_alias={db_alias}")
-    path = "/schema" + ("?" + "&".join(params) if params else "")
+    query = {k: v for k, v in (("table", table), ("db_alias", db_alias)) if v}
+    path = "/schema" + ("?" + urlencode(query) if query else "")
     result = _request(api_url, path, api_token, method="GET")
     tid = result.get("trace_id")
     if tid:
@@ -91,7 +265,7 @@ def call_query(
     db_alias: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """调用 POST /query，返回行列表。"""
-    body = {"sql": sql, "params": dict(params or {}), "db_alias": db_alias}
+    body = {"sql": sql, "params": _as_json_params(params), "db_alias": db_alias}
     result = _request(api_url, "/query", api_token, method="POST", body=body)
     tid = result.get("trace_id")
     if tid:
@@ -99,6 +273,53 @@ def call_query(
     return result.get("data", [])
 
 
+def call_query_iter(
+    api_url: str,
+    api_token: str,
+    sql: str,
+    params: Optional[Mapping[str, Any]] = None,
+    db_alias: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    调用 POST /query，逐行产出结果。
+    安装了 ijson 时边读响应边解析 data 数组，大结果集不必同时在内存中保留整个响应体和全部行；
+    未安装时等同于遍历 call_query 的结果。
+    """
+    if ijson is None:
+        yield from call_query(api_url, api_token, sql, params=params, db_alias=db_alias)
+        return
+    scheme, netloc, target, headers = _prepare(api_url, "/query", api_token)
+    body = {"sql": sql, "params": _as_json_params(params), "db_alias": db_alias}
+    resp, scheme, netloc = _open_response(scheme, netloc, "POST", target, _dumps(body), headers)
+    finished = False
+    try:
+        if resp.status >= 400:
+            raw = resp.read()
+            finished = True
+            _raise_for_status(resp.status, resp.reason, raw)
+        builder = None
+        # use_float 与 json.loads 保持一致：小数为 float，整数（含超 64 位）仍为 int
+        for prefix, event, value in ijson.parse(resp, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == "data.item" and event in ("end_map", "end_array"):
+                    yield builder.value
+                    builder = None
+            elif prefix == "data.item":
+                if event in ("start_map", "start_array"):
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                else:
+                    yield value
+            elif prefix == "trace_id" and event == "string":
+                logger.info("trace_id: %s", value)
+        finished = True
+    finally:
+        # 调用方中途停止遍历或解析出错时连接上还留有未读数据，不能再复用
+        if not finished or resp.will_close:
+            _drop_connection(scheme, netloc)
+
+
 def call_execute(
     api_url: str,
     api_token: str,
@@ -107,7 +328,7 @@ def call_execute(
     db_alias: Optional[str] = None,
 ) -> int:
     """调用 POST /execute，返回影响行数。"""
-    body = {"sql": sql, "params": dict(params or {}), "db_alias": db_alias}
+    body = {"sql": sql, "params": _as_json_params(params), "db_alias": db_alias}
     result = _request(api_url, "/execute", api_token, method="POST", body=body)
     tid = result.get("trace_id")
     if tid:
@@ -115,4 +336,56 @@ def call_execute(
     return result.get("data", {}).get("rows_affected", 0)
 
 
-__all__ = ["ApiClientError", "call_schema", "call_query", "call_execute", "call_list_databases"]
+# 异步版本：在默认线程池中执行同步调用，不阻塞事件循环。线程池的每个线程各自复用一条 keep-alive 连接，
+# 多个并发调用自然分摊到多条连接上，无需额外依赖 httpx/aiohttp。
+
+
+async def acall_list_databases(api_url: str, api_token: str) -> List[Dict[str, Any]]:
+    """call_list_databases 的异步版本。"""
+    return await asyncio.to_thread(call_list_databases, api_url, api_token)
+
+
+async def acall_schema(
+    api_url: str,
+    api_token: str,
+    table: Optional[str] = None,
+    db_alias: Optional[str] = None,
+) -> Dict[str, Any]:
+    """call_schema 的异步版本。"""
+    return await asyncio.to_thread(call_schema, api_url, api_token, table, db_alias)
+
+
+async def acall_query(
+    api_url: str,
+    api_token: str,
+    sql: str,
+    params: Optional[Mapping[str, Any]] = None,
+    db_alias: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """call_query 的异步版本。"""
+    return await asyncio.to_thread(call_query, api_url, api_token, sql, params, db_alias)
+
+
+async def acall_execute(
+    api_url: str,
+    api_token: str,
+    sql: str,
+    params: Optional[Mapping[str, Any]] = None,
+    db_alias: Optional[str] = None,
+) -> int:
+    """call_execute 的异步版本。"""
+    return await asyncio.to_thread(call_execute, api_url, api_token, sql, params, db_alias)
+
+
+__all__ = [
+    "ApiClientError",
+    "acall_execute",
+    "acall_list_databases",
+    "acall_query",
+    "acall_schema",
+    "call_schema",
+    "call_query",
+    "call_query_iter",
+    "call_execute",
+    "call_list_databases",
+]
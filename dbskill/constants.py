@@ -17,6 +17,10 @@ DB_TYPES_REQUIRING_HOST = (
 DB_TYPES_FILE_ONLY = ("sqlite",)
 # 所有支持的 direct 类型
 SUPPORTED_DB_TYPES = (*DB_TYPES_REQUIRING_HOST, *DB_TYPES_FILE_ONLY)
+# 成员判断用的集合形式（元组保留顺序，用于错误提示）
+SUPPORTED_DB_TYPE_SET = frozenset(SUPPORTED_DB_TYPES)
+DB_TYPES_REQUIRING_HOST_SET = frozenset(DB_TYPES_REQUIRING_HOST)
+DB_TYPES_FILE_ONLY_SET = frozenset(DB_TYPES_FILE_ONLY)
 
 # 默认端口
 DEFAULT_PORTS = {
@@ -11,7 +11,7 @@
 API 模式将在后续基于 HTTP 客户端接入。
 """
 
-from typing import Any, Dict, List, Mapping, Optional
+from typing import Any, List, Mapping, Optional
 
 from dbskill.api_client import call_query as api_call_query
 from dbskill.utils import (
@@ -34,7 +34,9 @@ def run_query(
     db_alias: Optional[str] = None,
     db_cfg: Optional[DatabaseConfig] = None,
     config_path: Optional[str] = None,
-) -> List[Dict[str, Any]]:
+    *,
+    as_mappings: bool = False,
+) -> List[Mapping[str, Any]]:
     """
     执行只读查询。
 
@@ -43,6 +45,7 @@ def run_query(
     :param db_alias: 可选数据库别名，默认使用 default_db
     :param db_cfg: 可选；若传入（如 API 服务端从后台解析）则直接使用
     :param config_path: 可选；显式指定 config.yaml 路径，用于自动发现失败时
+    :param as_mappings: Direct 模式下直接返回只读的 RowMapping 行，省去转 dict（API 模式始终为 dict）
     """
     if db_cfg is not None:
         if db_cfg.mode != "direct":
@@ -59,6 +62,7 @@ def run_query(
             sql=sql,
             params=params,
             source="skill.query",
+            as_mappings=as_mappings,
         )
 
     if db_cfg.mode == "api":
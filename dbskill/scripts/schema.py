@@ -9,9 +9,10 @@ Schema 查询脚本（Direct / API 双模式的对外入口）。
 API 模式将在后续基于 HTTP 客户端接入。
 """
 
-from typing import Any, Dict, List, Optional
+from __future__ import annotations
 
-from sqlalchemy import text
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from dbskill.api_client import call_schema as api_call_schema
 from dbskill.utils import (
@@ -23,41 +24,63 @@ from dbskill.utils import (
     run_direct_query,
 )
 
+if TYPE_CHECKING:
+    from sqlalchemy import TextClause
+
 
 def _resolve_db(app_config: AppConfig, db_alias: Optional[str]) -> DatabaseConfig:
     return get_database_config(app_config, db_alias=db_alias)
 
 
-def _normalize_schema_row(row: Dict[str, Any]) -> Dict[str, Any]:
-    """将可能为大写或别名的列名统一为 table_name, column_name, data_type。"""
-    key_map = {
-        "table_name": ("table_name", "TABLE_NAME", "TABNAME"),
-        "column_name": ("column_name", "COLUMN_NAME", "COLNAME"),
-        "data_type": ("data_type", "DATA_TYPE", "TYPENAME"),
-    }
-    out: Dict[str, Any] = {}
-    for target, candidates in key_map.items():
+# 目标列名 -> 各数据库可能返回的候选列名（大写或别名）
+_SCHEMA_KEY_CANDIDATES = (
+    ("table_name", ("table_name", "TABLE_NAME", "TABNAME")),
+    ("column_name", ("column_name", "COLUMN_NAME", "COLNAME")),
+    ("data_type", ("data_type", "DATA_TYPE", "TYPENAME")),
+)
+
+
+def _normalize_schema_rows(db_type: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    将结果集列名统一为 table_name, column_name, data_type（MySQL/PostgreSQL 等可能返回大写列名）。
+    同一结果集各行列名相同，只按首行确定一次源列，之后逐行直接取值。
+    """
+    if not rows:
+        return []
+    first = rows[0]
+    resolved = []
+    for target, candidates in _SCHEMA_KEY_CANDIDATES:
         for c in candidates:
-            if c in row and row[c] is not None:
-                out[target] = row[c]
+            if c in first:
+                resolved.append((target, c))
                 break
-    return out
+    return [{t: r[src] for t, src in resolved if r[src] is not None} for r in rows]
 
 
-def _normalize_schema_rows(db_type: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """将结果集列名统一为 table_name, column_name, data_type（MySQL/PostgreSQL 等可能返回大写列名）。"""
-    return [_normalize_schema_row(r) for r in rows]
+@lru_cache(maxsize=32)
+def _schema_text(db_type: str, with_table: bool) -> TextClause:
+    """按 (db_type, 是否按表过滤) 缓存构造好的 TextClause，重复调用不再解析 SQL 与绑定参数。"""
+    from sqlalchemy import text
 
+    return text(_schema_sql(db_type, with_table))
 
-def _build_schema_query(db_cfg: DatabaseConfig, table: Optional[str]) -> str:
-    db_type = (db_cfg.type or "").lower()
+
+def _schema_sql(db_type: str, with_table: bool) -> str:
+    """各库类型的元数据查询模板；表名通过 :table_name 绑定。"""
+    if db_type == "sqlite":
+        # pragma_table_info 表值函数（SQLite >= 3.16）可绑定表名，且是普通 SELECT，能通过只读校验
+        return """
+        SELECT :table_name AS table_name, name AS column_name, type AS data_type
+        FROM pragma_table_info(:table_name)
+        ORDER BY cid
+        """
     if db_type == "postgres" or db_type == "kingbase":
         base = """
         SELECT table_name, column_name, data_type
         FROM information_schema.columns
         WHERE table_schema = 'public'
         """
-        if table:
+        if with_table:
             base += " AND table_name = :table_name"
         return base + " ORDER BY table_name, ordinal_position"
     if db_type == "mysql" or db_type == "mariadb":
@@ -66,7 +89,7 @@ def _build_schema_query(db_cfg: DatabaseConfig, table: Optional[str]) -> str:
         FROM information_schema.columns
         WHERE table_schema = DATABASE()
         """
-        if table:
+        if with_table:
             base += " AND table_name = :table_name"
         return base + " ORDER BY table_name, ordinal_position"
     if db_type == "oracle" or db_type == "dm":
@@ -74,7 +97,7 @@ def _build_schema_query(db_cfg: DatabaseConfig, table: Optional[str]) -> str:
         SELECT table_name, column_name, data_type
         FROM user_tab_columns
         """
-        if table:
+        if with_table:
             base += " WHERE table_name = :table_name"
         return base + " ORDER BY table_name, column_id"
     if db_type == "mssql":
@@ -83,7 +106,7 @@ def _build_schema_query(db_cfg: DatabaseConfig, table: Optional[str]) -> str:
         FROM INFORMATION_SCHEMA.COLUMNS
         WHERE TABLE_SCHEMA = 'dbo'
         """
-        if table:
+        if with_table:
             base += " AND table_name = :table_name"
         return base + " ORDER BY table_name, ordinal_position"
     if db_type == "db2":
@@ -91,14 +114,18 @@ def _build_schema_query(db_cfg: DatabaseConfig, table: Optional[str]) -> str:
         SELECT TABNAME AS table_name, COLNAME AS column_name, TYPENAME AS data_type
         FROM SYSCAT.COLUMNS
         """
-        if table:
+        if with_table:
             base += " WHERE TABNAME = :table_name"
         return base + " ORDER BY TABNAME, COLNO"
+    raise ValueError(f"schema query not implemented for database type: {db_type!r}")
+
+
+def _build_schema_query(db_cfg: DatabaseConfig, table: Optional[str]) -> TextClause:
+    db_type = (db_cfg.type or "").lower()
     if db_type == "sqlite":
         if not table:
             raise ValueError("sqlite schema query requires table name")
-        return f"PRAGMA table_info({table})"
-    raise ValueError(f"schema query not implemented for database type: {db_type!r}")
+    return _schema_text(db_type, bool(table))
 
 
 def get_schema(
@@ -135,30 +162,15 @@ def get_schema(
 
     db_type = (db_cfg.type or "").lower()
     sql = _build_schema_query(db_cfg, table)
-
-    if db_type == "sqlite":
-        # sqlite 的 PRAGMA table_info 返回不同字段结构，这里单独处理
-        rows = run_direct_query(
-            app_config=app_cfg,
-            db_cfg=db_cfg,
-            sql=sql,
-            params=None,
-            source="skill.schema",
-        )
-        columns = [
-            {"table_name": table, "column_name": r.get("name"), "data_type": r.get("type")}
-            for r in rows
-        ]
-    else:
-        params = {"table_name": table} if table else None
-        rows = run_direct_query(
-            app_config=app_cfg,
-            db_cfg=db_cfg,
-            sql=sql,
-            params=params,
-            source="skill.schema",
-        )
-        columns = _normalize_schema_rows(db_type, rows)
+    params = {"table_name": table} if table else None
+    rows = run_direct_query(
+        app_config=app_cfg,
+        db_cfg=db_cfg,
+        sql=sql,
+        params=params,
+        source="skill.schema",
+    )
+    columns = _normalize_schema_rows(db_type, rows)
 
     return {
         "db_alias": db_cfg.alias,
@@ -0,0 +1,63 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# api.services.models 导入时即按 ADMIN_DB_PATH 创建 Engine：必须在导入 api 之前指向临时库，测试不碰真实 admin.db
+_TMP_DIR = Path(tempfile.mkdtemp(prefix="dbskill-tests-"))
+os.environ["ADMIN_DB_PATH"] = str(_TMP_DIR / "admin.db")
+
+
+@pytest.fixture
+def admin_db():
+    """建表后返回同步 Engine；每个测试前清空会互相影响的表。"""
+    from sqlalchemy import text
+
+    from api.services.models import engine, init_admin_db
+
+    init_admin_db()
+    with engine.begin() as conn:
+        for table in ("api_audit_logs", "api_key_databases", "api_keys", "databases"):
+            conn.execute(text(f"DELETE FROM {table}"))
+    return engine
+
+
+@pytest.fixture(autouse=True)
+def _reset_auth_state():
+    from api import auth
+
+    auth._api_key_cache.clear()
+    auth._auth_failures.clear()
+    yield
+    auth._api_key_cache.clear()
+    auth._auth_failures.clear()
+
+
+@pytest.fixture
+def add_api_key(admin_db):
+    """向 admin.db 写入一个 API Key，返回其 id；默认按当前算法哈希 token。"""
+    from api.auth import hash_api_key
+    from api.services.models import ApiKey, SessionLocal
+
+    def add(token: str, *, key_hash: str | None = None, permission_level: str = "readonly", **fields) -> int:
+        with SessionLocal() as db:
+            row = ApiKey(key_hash=key_hash or hash_api_key(token), permission_level=permission_level, **fields)
+            db.add(row)
+            db.commit()
+            return row.id
+
+    return add
+
+
+@pytest.fixture
+def lookup_api_key():
+    """按 token 解析 ApiKey（经过进程内缓存）。"""
+    from api.auth import _lookup_api_key
+    from api.services.models import SessionLocal
+
+    def lookup(token: str):
+        with SessionLocal() as db:
+            return _lookup_api_key(db, token)
+
+    return lookup
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from api.services import models
+from api.services.models import make_key_hint, mask_key_hint
+
+_OLD_API_KEYS = """
+    CREATE TABLE api_keys (
+        id INTEGER NOT NULL PRIMARY KEY,
+        key_hash VARCHAR(128) NOT NULL,
+        raw_key VARCHAR(80) NOT NULL,
+        permission_level VARCHAR(16) NOT NULL DEFAULT 'readonly',
+        db_config_ref VARCHAR(100),
+        name VARCHAR(100),
+        created_at DATETIME
+    )
+"""
+
+
+@pytest.fixture
+def old_admin_db(tmp_path, monkeypatch):
+    """旧版本 admin.db：api_keys 仍保存明文 raw_key，user_version 为 0。"""
+    eng = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with eng.begin() as conn:
+        conn.execute(text(_OLD_API_KEYS))
+        conn.execute(text("INSERT INTO api_keys (id, key_hash, raw_key, name) VALUES (1, 'h', 'sk-abcdefgh123456wxyz', 'k')"))
+    monkeypatch.setattr(models, "engine", eng)
+    yield eng
+    eng.dispose()
+
+
+def _user_version(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def _fail(*_args, **_kwargs):
+    raise AssertionError("migrations must not run again")
+
+
+def test_migration_records_schema_version(old_admin_db):
+    assert _user_version(old_admin_db) == 0
+    models._create_and_migrate()
+    assert _user_version(old_admin_db) == models._SCHEMA_VERSION
+
+
+def test_migration_skipped_when_user_version_current(old_admin_db, monkeypatch):
+    models._create_and_migrate()
+    monkeypatch.setattr(models, "_migrate_api_keys_drop_raw_key", _fail)
+    monkeypatch.setattr(models.Base.metadata, "create_all", _fail)
+    models._create_and_migrate()
+
+
+def test_migration_reruns_when_schema_version_is_bumped(old_admin_db, monkeypatch):
+    models._create_and_migrate()
+    monkeypatch.setattr(models, "_SCHEMA_VERSION", models._SCHEMA_VERSION + 1)
+    calls = []
+    monkeypatch.setattr(models, "_migrate_api_keys_drop_raw_key", calls.append)
+    models._create_and_migrate()
+    assert len(calls) == 1
+    assert _user_version(old_admin_db) == models._SCHEMA_VERSION
+
+
+def _columns(engine, table):
+    with engine.connect() as conn:
+        return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def test_migration_replaces_raw_key_with_hint(old_admin_db):
+    models._create_and_migrate()
+    cols = _columns(old_admin_db, "api_keys")
+    assert "raw_key" not in cols
+    assert {"key_hint", "enabled"} <= cols
+    with old_admin_db.connect() as conn:
+        row = conn.execute(text("SELECT key_hash, key_hint, name, enabled FROM api_keys WHERE id = 1")).one()
+    # 哈希不变，已发放的 key 继续可用；明文只保留前 8 位与后 4 位
+    assert tuple(row) == ("h", "sk-abcde****wxyz", "k", 1)
+
+
+def test_new_schema_has_no_plaintext_key_column(admin_db):
+    assert "raw_key" not in _columns(admin_db, "api_keys")
+
+
+def test_key_hint_masks_the_middle():
+    hint = make_key_hint("sk-abcdefgh123456wxyz")
+    assert hint == "sk-abcde****wxyz"
+    assert mask_key_hint(hint) == "sk-abc****wxyz"
+    assert mask_key_hint(None) == "****"
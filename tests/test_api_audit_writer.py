@@ -0,0 +1,53 @@
+from fastapi import BackgroundTasks
+from sqlalchemy import func, select
+from starlette.requests import Request
+
+from api.services import audit
+from api.services.models import ApiAuditLog
+
+
+def _request():
+    return Request({"type": "http", "method": "POST", "path": "/query", "headers": [], "client": ("1.2.3.4", 1)})
+
+
+def _audit_count(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(ApiAuditLog)).scalar()
+
+
+def test_stop_audit_writer_drains_queue(admin_db, monkeypatch):
+    monkeypatch.setattr(audit, "API_AUDIT_CONFIG", audit.ApiAuditConfig(enabled=True, background_writer=True))
+    audit.start_audit_writer()
+    assert audit._audit_writer is not None
+    for i in range(500):
+        audit.write_api_audit_log(_request(), None, "select 1", {"i": i}, "a", f"t{i}")
+    audit.stop_audit_writer()
+
+    assert audit._audit_writer is None
+    assert audit._audit_queue.empty()
+    assert _audit_count(admin_db) == 500
+
+    # 写入线程停止后改为同步写入
+    audit.write_api_audit_log(_request(), None, "select 2", None, "a", "late")
+    assert _audit_count(admin_db) == 501
+
+
+def test_without_writer_thread_record_goes_to_background_tasks(admin_db, monkeypatch):
+    monkeypatch.setattr(audit, "API_AUDIT_CONFIG", audit.ApiAuditConfig(enabled=True, background_writer=False))
+    audit.start_audit_writer()
+    assert audit._audit_writer is None
+
+    background = BackgroundTasks()
+    audit.write_api_audit_log(_request(), None, "select 1", None, "a", "t", background=background)
+    assert _audit_count(admin_db) == 0
+    assert len(background.tasks) == 1
+
+    task = background.tasks[0]
+    task.func(*task.args, **task.kwargs)
+    assert _audit_count(admin_db) == 1
+
+
+def test_disabled_audit_writes_nothing(admin_db, monkeypatch):
+    monkeypatch.setattr(audit, "API_AUDIT_CONFIG", audit.ApiAuditConfig(enabled=False))
+    audit.write_api_audit_log(_request(), None, "select 1", None, "a", "t")
+    assert _audit_count(admin_db) == 0
@@ -0,0 +1,116 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dbskill import api_client
+from dbskill.api_client import ApiClientError, call_execute, call_list_databases, call_query
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args):
+        pass
+
+    def _reply(self, status, payload=None, headers=()):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        server.requests.append((self.command, self.path, dict(self.headers), body))
+        action = server.actions.pop(0) if server.actions else None
+        if action == "drop":
+            # 读完请求后不回复直接断开：模拟服务端已处理请求但响应丢失
+            self.close_connection = True
+            self.connection.close()
+            return
+        if isinstance(action, tuple):
+            self._reply(action[0], headers=[("Location", action[1])])
+            return
+        self._reply(200, {"data": [{"path": self.path}], "trace_id": "t"} if self.command == "GET" else {
+            "data": {"rows_affected": 1} if self.path.endswith("execute") else [body],
+            "trace_id": "t",
+        })
+
+    do_GET = do_POST = _handle
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.requests, srv.actions = [], []
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    srv.url = f"http://127.0.0.1:{srv.server_port}"
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    for conn, _ in getattr(api_client._local, "conns", {}).values():
+        conn.close()
+    api_client._local.conns = {}
+
+
+@pytest.fixture(autouse=True)
+def _no_proxy_env(monkeypatch):
+    for name in ("http_proxy", "https_proxy", "no_proxy", "HTTP_PROXY", "HTTPS_PROXY", "NO_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_post_is_not_resent_after_response_is_lost(server):
+    call_list_databases(server.url, "tok")  # 建立 keep-alive 连接，之后的 POST 走复用连接
+    server.actions.append("drop")
+    with pytest.raises(ApiClientError, match="not resent"):
+        call_execute(server.url, "tok", "update t set x = 1")
+    assert [r[0] for r in server.requests] == ["GET", "POST"]
+
+
+def test_get_is_resent_on_stale_connection(server):
+    call_list_databases(server.url, "tok")
+    server.actions.append("drop")
+    assert call_list_databases(server.url, "tok") == [{"path": "/databases"}]
+    assert [r[0] for r in server.requests] == ["GET", "GET", "GET"]
+
+
+def test_post_follows_307_with_body(server):
+    server.actions.append((307, "/v2/query"))
+    rows = call_query(server.url, "tok", "select 1")
+    assert rows == [{"sql": "select 1", "params": {}, "db_alias": None}]
+    assert [(r[0], r[1]) for r in server.requests] == [("POST", "/query"), ("POST", "/v2/query")]
+    assert server.requests[1][2]["Authorization"] == "Bearer tok"
+
+
+def test_redirect_to_other_host_drops_authorization(server):
+    server.actions.append((302, f"http://localhost:{server.server_port}/databases"))
+    call_list_databases(server.url, "tok")
+    assert "Authorization" not in server.requests[1][2]
+
+
+def test_redirect_loop_is_bounded(server):
+    server.actions.extend([(302, "/databases")] * 20)
+    with pytest.raises(ApiClientError, match="too many redirects"):
+        call_list_databases(server.url, "tok")
+
+
+def test_http_proxy_from_environment(server, monkeypatch):
+    monkeypatch.setenv("HTTP_PROXY", f"http://user:pw@127.0.0.1:{server.server_port}")
+    call_list_databases("http://dbskill.invalid:8000", "tok")
+    method, path, headers, _ = server.requests[0]
+    assert path == "http://dbskill.invalid:8000/databases"
+    assert headers["Proxy-Authorization"] == "Basic dXNlcjpwdw=="
+
+
+def test_no_proxy_bypasses_proxy(server, monkeypatch):
+    monkeypatch.setenv("HTTP_PROXY", "http://127.0.0.1:9")
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    assert call_list_databases(server.url, "tok") == [{"path": "/databases"}]
@@ -0,0 +1,56 @@
+from sqlalchemy import update
+
+from api import auth
+from api.auth import hash_api_key, invalidate_api_key_cache
+from api.services.models import ApiKey as DbApiKey
+from api.services.models import SessionLocal
+
+
+def _set_enabled(key_id: int, enabled: bool) -> None:
+    with SessionLocal() as db:
+        db.execute(update(DbApiKey).where(DbApiKey.id == key_id).values(enabled=enabled))
+        db.commit()
+
+
+def test_lookup_is_cached_until_invalidated(add_api_key, lookup_api_key):
+    key_id = add_api_key("tok-a")
+    assert lookup_api_key("tok-a").key_id == key_id
+
+    # 缓存命中期间数据库的变更不可见，管理端主动失效后立即生效
+    _set_enabled(key_id, False)
+    assert lookup_api_key("tok-a") is not None
+    invalidate_api_key_cache(key_id)
+    assert lookup_api_key("tok-a") is None
+
+
+def test_invalidate_by_id_keeps_other_keys(add_api_key, lookup_api_key):
+    a = add_api_key("tok-a")
+    b = add_api_key("tok-b")
+    lookup_api_key("tok-a")
+    lookup_api_key("tok-b")
+    _set_enabled(b, False)
+
+    invalidate_api_key_cache(a)
+    assert lookup_api_key("tok-b") is not None
+
+    invalidate_api_key_cache()
+    assert lookup_api_key("tok-b") is None
+
+
+def test_expired_entry_is_reloaded(add_api_key, lookup_api_key):
+    key_id = add_api_key("tok-a")
+    lookup_api_key("tok-a")
+    _set_enabled(key_id, False)
+    h = hash_api_key("tok-a")
+    auth._api_key_cache[h] = (0.0, auth._api_key_cache[h][1])
+    assert lookup_api_key("tok-a") is None
+
+
+def test_cache_size_is_bounded(admin_db, lookup_api_key, monkeypatch):
+    monkeypatch.setattr(auth, "_API_KEY_CACHE_MAXSIZE", 3)
+    for i in range(5):
+        lookup_api_key(f"tok-{i}")
+    assert len(auth._api_key_cache) == 3
+    # 满时先淘汰最早插入的记录
+    assert hash_api_key("tok-4") in auth._api_key_cache
+    assert hash_api_key("tok-0") not in auth._api_key_cache
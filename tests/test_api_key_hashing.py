@@ -0,0 +1,25 @@
+import hashlib
+
+from api.admin.routes import _generate_api_key
+from api.auth import _legacy_hash_api_key, hash_api_key
+from api.services.models import ApiKey as DbApiKey
+from api.services.models import SessionLocal
+
+
+def test_hash_is_blake2b_256_hex():
+    assert hash_api_key("tok") == hashlib.blake2b(b"tok", digest_size=32).hexdigest()
+    assert len(hash_api_key("tok")) == len(_legacy_hash_api_key("tok")) == 64
+
+
+def test_generated_keys_are_unique_and_hashed():
+    raw, key_hash = _generate_api_key()
+    assert raw.startswith("sk_") and len(raw) == 35
+    assert key_hash == hash_api_key(raw)
+    assert _generate_api_key()[0] != raw
+
+
+def test_legacy_sha256_hash_is_upgraded(add_api_key, lookup_api_key):
+    key_id = add_api_key("tok-old", key_hash=_legacy_hash_api_key("tok-old"))
+    assert lookup_api_key("tok-old").key_id == key_id
+    with SessionLocal() as db:
+        assert db.get(DbApiKey, key_id).key_hash == hash_api_key("tok-old")
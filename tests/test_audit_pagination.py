@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from api.services import audit
+from api.services.models import ApiAuditLog, AsyncSessionLocal
+
+_BASE_TS = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _insert_audit_rows(engine, n):
+    # 相邻两条共用同一 ts，检验 (ts, id) 组合游标不会在并列时丢行或重复
+    rows = [
+        {
+            "ts": _BASE_TS + timedelta(seconds=i // 2),
+            "trace_id": f"t{i}",
+            "path": "/query",
+            "db_alias": "a" if i % 3 else "b",
+            "api_key_name": "k",
+        }
+        for i in range(n)
+    ]
+    with engine.begin() as conn:
+        conn.execute(ApiAuditLog.__table__.insert(), rows)
+
+
+def _list(**kwargs):
+    async def run():
+        async with AsyncSessionLocal() as session:
+            return await audit.list_audit_logs(session, **kwargs)
+
+    return asyncio.run(run())
+
+
+def _walk_with_cursor(per_page, **filters):
+    entries, _, cursor = _list(per_page=per_page, **filters)
+    seen = [e["trace_id"] for e in entries]
+    while cursor is not None:
+        entries, total, cursor = _list(per_page=per_page, cursor=cursor, count_total=False, **filters)
+        assert total is None
+        seen.extend(e["trace_id"] for e in entries)
+    return seen
+
+
+def test_keyset_pages_match_offset_order(admin_db):
+    _insert_audit_rows(admin_db, 11)
+    everything, total, _ = _list(per_page=100)
+    assert total == 11
+    expected = [e["trace_id"] for e in everything]
+    assert len(set(expected)) == 11
+
+    assert _walk_with_cursor(per_page=3) == expected
+    assert _walk_with_cursor(per_page=2, db_alias="b") == [t for t in expected if int(t[1:]) % 3 == 0]
+
+
+def test_first_page_returns_cursor_and_total(admin_db):
+    _insert_audit_rows(admin_db, 5)
+    entries, total, cursor = _list(per_page=2)
+    assert total == 5 and len(entries) == 2
+    rest, total, _ = _list(per_page=2, cursor=cursor, count_total=True)
+    assert total == 5
+    assert [e["trace_id"] for e in rest] == ["t2", "t1"]
+
+    assert _list(per_page=2, page=9)[1] == 5
+
+
+def test_keyset_pages_respect_date_filter(admin_db):
+    _insert_audit_rows(admin_db, 6)
+    with admin_db.begin() as conn:
+        conn.execute(
+            ApiAuditLog.__table__.insert(),
+            [{"ts": _BASE_TS - timedelta(days=1), "trace_id": "old", "path": "/query", "api_key_name": "k"}],
+        )
+    walked = _walk_with_cursor(per_page=4, date_from=_BASE_TS.strftime("%Y-%m-%d"))
+    assert walked == ["t5", "t4", "t3", "t2", "t1", "t0"]
@@ -0,0 +1,86 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from api import auth
+from api.auth import AuthThrottleConfig, invalidate_api_key_cache
+
+
+def test_unknown_token_is_negatively_cached(add_api_key, lookup_api_key):
+    assert lookup_api_key("tok-new") is None
+    key_id = add_api_key("tok-new")
+    assert lookup_api_key("tok-new") is None
+
+    # 按 key_id 失效时一并清除全部未命中记录
+    invalidate_api_key_cache(key_id)
+    assert lookup_api_key("tok-new").key_id == key_id
+
+
+@pytest.fixture
+def throttle(monkeypatch):
+    cfg = AuthThrottleConfig(enabled=True, max_failures=3, window_seconds=10.0, trusted_proxies=frozenset({"10.0.0.1"}))
+    monkeypatch.setattr(auth, "AUTH_THROTTLE_CONFIG", cfg)
+    return cfg
+
+
+def test_throttle_limits_failures_per_client(throttle):
+    for i in range(3):
+        auth._throttle_auth_failure("1.1.1.1", 100.0 + i)
+    with pytest.raises(HTTPException) as exc:
+        auth._throttle_auth_failure("1.1.1.1", 103.0)
+    assert exc.value.status_code == 429
+
+    # 其它客户端不受影响；窗口过后恢复
+    auth._throttle_auth_failure("2.2.2.2", 103.0)
+    auth._throttle_auth_failure("1.1.1.1", 111.0)
+
+
+def test_throttle_only_counts_failures(add_api_key, throttle):
+    from api.main import app
+
+    add_api_key("tok-ok")
+    with TestClient(app) as client:
+        for _ in range(10):
+            assert client.get("/databases", headers={"Authorization": "Bearer tok-ok"}).status_code == 200
+    assert not auth._auth_failures
+
+
+def test_throttle_evicts_least_recent_client(throttle, monkeypatch):
+    monkeypatch.setattr(auth, "_AUTH_FAIL_MAX_CLIENTS", 2)
+    auth._throttle_auth_failure("a", 1.0)
+    auth._throttle_auth_failure("b", 2.0)
+    auth._throttle_auth_failure("a", 3.0)
+    auth._throttle_auth_failure("c", 4.0)
+    assert list(auth._auth_failures) == ["a", "c"]
+
+
+def _request(client_host: str, forwarded: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (client_host, 1234)})
+
+
+def test_client_address_honours_trusted_proxies_only(throttle):
+    assert auth._client_address(_request("10.0.0.1", "6.6.6.6, 5.5.5.5, 10.0.0.1")) == "5.5.5.5"
+    assert auth._client_address(_request("10.0.0.1")) == "10.0.0.1"
+    # 非受信来源伪造的 X-Forwarded-For 被忽略
+    assert auth._client_address(_request("7.7.7.7", "5.5.5.5")) == "7.7.7.7"
+
+
+def test_valid_token_is_never_throttled(add_api_key, throttle):
+    from api.main import app
+
+    add_api_key("tok-ok")
+    bad = {"Authorization": "Bearer nope"}
+    with TestClient(app) as client:
+        assert [client.get("/databases", headers=bad).status_code for _ in range(4)] == [401, 401, 401, 429]
+        assert client.get("/databases", headers={"Authorization": "Bearer tok-ok"}).status_code == 200
+
+
+def test_throttle_disabled_by_default(admin_db):
+    from api.main import app
+
+    assert auth.AUTH_THROTTLE_CONFIG.enabled is False
+    with TestClient(app) as client:
+        codes = {client.get("/databases", headers={"Authorization": "Bearer nope"}).status_code for _ in range(40)}
+    assert codes == {401}
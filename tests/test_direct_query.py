@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+from dbskill.utils import AppConfig, AuditConfig, DatabaseConfig, run_direct_query
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    path = tmp_path / "t.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    conn.close()
+    db = DatabaseConfig(alias="t", type="sqlite", database=str(path))
+    return AppConfig(databases={"t": db}, default_db="t", audit=AuditConfig(enabled=False)), db, path
+
+
+def _values(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [r[0] for r in conn.execute("SELECT v FROM t ORDER BY v")]
+    finally:
+        conn.close()
+
+
+def test_readonly_query_returns_rows(sqlite_db):
+    cfg, db, _ = sqlite_db
+    assert run_direct_query(cfg, db, "select v from t", None, "test") == [{"v": 1}]
+
+
+def test_write_behind_readonly_prefix_is_rolled_back(sqlite_db):
+    cfg, db, path = sqlite_db
+    # 以 WITH 开头能通过首词检查，但实际是带 RETURNING 的写入：查询结束时回滚，不落库
+    rows = run_direct_query(cfg, db, "WITH x AS (SELECT 2 AS v) INSERT INTO t SELECT v FROM x RETURNING v", None, "test")
+    assert rows == [{"v": 2}]
+    assert _values(path) == [1]
+
+
+def test_failed_write_behind_readonly_prefix_is_rolled_back(sqlite_db):
+    cfg, db, path = sqlite_db
+    with pytest.raises(Exception):
+        run_direct_query(cfg, db, "WITH x AS (SELECT 3 AS v) INSERT INTO t SELECT v FROM x", None, "test")
+    assert _values(path) == [1]
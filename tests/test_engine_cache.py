@@ -0,0 +1,80 @@
+import pytest
+
+from api.admin.routes import _probe_connection
+from dbskill import utils
+from dbskill.utils import DatabaseConfig, create_sqlalchemy_engine, evict_idle_sqlalchemy_engines
+
+
+@pytest.fixture(autouse=True)
+def _empty_engine_cache():
+    utils._engine_cache.clear()
+    yield
+    for engine, _ in utils._engine_cache.values():
+        engine.dispose()
+    utils._engine_cache.clear()
+
+
+def _cfg(path):
+    return DatabaseConfig(alias="t", type="sqlite", database=str(path))
+
+
+def _url(path):
+    return utils._build_direct_connection_url(_cfg(path))
+
+
+def _dispose_spy(monkeypatch, engine):
+    calls = []
+    monkeypatch.setattr(engine, "dispose", lambda *a, **k: calls.append(engine))
+    return calls
+
+
+def test_engine_is_reused(tmp_path):
+    assert create_sqlalchemy_engine(_cfg(tmp_path / "a.db")) is create_sqlalchemy_engine(_cfg(tmp_path / "a.db"))
+
+
+def test_lru_eviction_disposes_oldest(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_ENGINE_CACHE_MAXSIZE", 2)
+    a = create_sqlalchemy_engine(_cfg(tmp_path / "a.db"))
+    disposed = _dispose_spy(monkeypatch, a)
+    create_sqlalchemy_engine(_cfg(tmp_path / "b.db"))
+    create_sqlalchemy_engine(_cfg(tmp_path / "a.db"))  # a 变为最近使用
+    b = utils._engine_cache[_url(tmp_path / "b.db")][0]
+    disposed_b = _dispose_spy(monkeypatch, b)
+    create_sqlalchemy_engine(_cfg(tmp_path / "c.db"))
+
+    assert list(utils._engine_cache) == [_url(tmp_path / "a.db"), _url(tmp_path / "c.db")]
+    assert disposed == [] and disposed_b == [b]
+
+
+def test_idle_engines_are_evicted(tmp_path, monkeypatch):
+    old = create_sqlalchemy_engine(_cfg(tmp_path / "old.db"))
+    fresh = create_sqlalchemy_engine(_cfg(tmp_path / "fresh.db"))
+    disposed = _dispose_spy(monkeypatch, old)
+    url = _url(tmp_path / "old.db")
+    utils._engine_cache[url] = (old, utils._engine_cache[url][1] - utils._ENGINE_IDLE_TIMEOUT - 1)
+    utils._engine_cache.move_to_end(url, last=False)
+
+    assert evict_idle_sqlalchemy_engines() == 1
+    assert disposed == [old]
+    assert list(utils._engine_cache) == [_url(tmp_path / "fresh.db")]
+    assert create_sqlalchemy_engine(_cfg(tmp_path / "fresh.db")) is fresh
+
+
+def test_uncached_engine_is_not_stored(tmp_path):
+    engine = create_sqlalchemy_engine(_cfg(tmp_path / "a.db"), cached=False)
+    engine.dispose()
+    assert not utils._engine_cache
+
+
+def test_unsaved_config_probe_keeps_nothing(tmp_path):
+    assert _probe_connection(_cfg(tmp_path / "a.db"), cached=False) == {"ok": True}
+    assert not utils._engine_cache
+
+
+def test_saved_config_probe_reuses_engine_and_drops_it_on_failure(tmp_path):
+    assert _probe_connection(_cfg(tmp_path / "a.db")) == {"ok": True}
+    assert list(utils._engine_cache) == [_url(tmp_path / "a.db")]
+
+    missing = tmp_path / "no-such-dir" / "b.db"
+    assert _probe_connection(_cfg(missing))["ok"] is False
+    assert _url(missing) not in utils._engine_cache
@@ -0,0 +1,38 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes.execute import _sql_is_delete
+
+
+@pytest.fixture
+def write_key(add_api_key):
+    add_api_key("tok-write", permission_level="write")
+    return {"Authorization": "Bearer tok-write"}
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("delete from t", True),
+        ("  DELETE\nfrom t", True),
+        ("delete", True),
+        ("/* c */ DELETE FROM t", True),
+        ("-- c\ndelete from t", True),
+        ("/* a */ -- b\n/* c */ delete from t", True),
+        ("deleted_rows", False),
+        ("update t set note = 'delete'", False),
+        ("insert into t values (1)", False),
+    ],
+)
+def test_sql_is_delete(sql, expected):
+    assert _sql_is_delete(sql) is expected
+
+
+@pytest.mark.parametrize("sql", ["DELETE FROM t", "/* c */ DELETE FROM t", "-- c\ndelete from t"])
+def test_delete_requires_full_key(write_key, sql):
+    from api.main import app
+
+    with TestClient(app) as client:
+        r = client.post("/execute", json={"sql": sql}, headers=write_key)
+    assert r.status_code == 403
+    assert r.json()["detail"] == "DELETE requires full permission"
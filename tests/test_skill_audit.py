@@ -0,0 +1,93 @@
+import json
+import queue
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from dbskill import utils
+from dbskill.utils import AppConfig, AuditConfig, DatabaseConfig, write_audit_log
+
+
+@pytest.fixture
+def app_config(tmp_path, monkeypatch):
+    # 关闭写入线程、同步写入等模块状态在测试间恢复
+    monkeypatch.setattr(utils, "_audit_sync_only", False)
+    monkeypatch.setattr(utils, "_audit_atexit_registered", True)
+    db = DatabaseConfig(alias="t", type="sqlite", database=":memory:")
+    cfg = AppConfig(databases={"t": db}, default_db="t", audit=AuditConfig(enabled=True, log_dir=str(tmp_path)))
+    yield cfg
+    utils._flush_audit_logs()
+    utils._close_audit_fh()
+
+
+def _records(log_dir):
+    return [json.loads(line) for path in sorted(log_dir.glob("*.jsonl")) for line in path.read_text().splitlines()]
+
+
+def test_flush_drains_background_writer(app_config, tmp_path):
+    db = app_config.databases["t"]
+    for i in range(1000):
+        write_audit_log(app_config, db, "select :i", {"i": i}, None, "test")
+    assert utils._audit_writer is not None
+
+    utils._flush_audit_logs()
+    assert utils._audit_writer is None
+    assert utils._audit_queue.empty()
+    assert [r["params"]["i"] for r in _records(tmp_path)] == list(range(1000))
+
+
+def test_shutdown_switches_to_sync_writes(app_config, tmp_path):
+    db = app_config.databases["t"]
+    write_audit_log(app_config, db, "select 1", None, None, "test")
+    utils._shutdown_audit_writer()
+    assert len(_records(tmp_path)) == 1
+
+    # atexit 之后不再启动写入线程，记录直接落盘
+    write_audit_log(app_config, db, "update t set x = 1", {}, 3, "test")
+    assert utils._audit_writer is None
+    records = _records(tmp_path)
+    assert [r["rows_affected"] for r in records] == [None, 3]
+    assert records[-1]["params"] == {}
+
+
+def test_full_queue_falls_back_to_sync_write(app_config, tmp_path, monkeypatch):
+    db = app_config.databases["t"]
+    monkeypatch.setattr(utils, "_start_audit_writer", lambda: True)
+    monkeypatch.setattr(utils, "_audit_queue", queue.Queue(maxsize=1))
+    write_audit_log(app_config, db, "select 1", None, None, "test")
+    write_audit_log(app_config, db, "select 2", None, None, "test")
+    # 第一条留在队列里，第二条因队列已满直接落盘
+    assert [r["sql"] for r in _records(tmp_path)] == ["select 2"]
+    assert utils._audit_queue.qsize() == 1
+
+
+def test_big_int_params_fall_back_to_stdlib_json(app_config, tmp_path):
+    db = app_config.databases["t"]
+    write_audit_log(app_config, db, "select :n", {"n": 2**70}, None, "test")
+    utils._flush_audit_logs()
+    assert _records(tmp_path)[0]["params"] == {"n": 2**70}
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        {"sql": "select 1", "params": {}},
+        {"params": {"when": datetime(2024, 1, 2, tzinfo=timezone.utc), "d": Decimal("1.5")}},
+        {"params": {1: "non-str key"}},
+        {"params": {"n": -(2**80)}},
+        {"sql": "中文 ✓"},
+    ],
+)
+def test_dumps_record_is_one_json_line(record):
+    line = utils._dumps_record(record)
+    assert isinstance(line, bytes) and b"\n" not in line
+    decoded = json.loads(line)
+    assert decoded.keys() == record.keys()
+
+
+def test_dumps_record_stringifies_unknown_types():
+    line = utils._dumps_record({"params": {"when": datetime(2024, 1, 2, tzinfo=timezone.utc), 1: Decimal("1.5")}})
+    params = json.loads(line)["params"]
+    assert params["when"].startswith("2024-01-02")
+    assert params["1"] == "1.5"
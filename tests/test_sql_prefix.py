@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from dbskill.utils import _cached_sql_prefix, _normalize_sql_prefix, ensure_readonly_sql, ensure_write_sql
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "select 1",
+        "  SELECT * FROM t",
+        "\n\twith x as (select 1) select * from x",
+        "-- comment\nselect 1",
+        "/* block */ select 1",
+        "/* a */ -- b\n  /* multi\nline */\nSelect 1",
+        "/**//**/select 1",
+        "/* a *//* b */\n-- c\n-- d\nselect 1",
+        "/* -- not a line comment */ select 1",
+        "-- /* not a block comment\nselect 1",
+        "-- only a comment line\n-- another\nwith x as (select 1) select * from x",
+    ],
+)
+def test_readonly_accepts_select_and_cte(sql):
+    ensure_readonly_sql(sql)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "",
+        "   ",
+        "delete from t",
+        "update t set x = 1",
+        "selectx from t",
+        "-- select 1",
+        "/* select 1",
+        "/* unterminated select 1\n",
+        "-- no trailing newline select 1",
+        "/* a */ -- b",
+        "/* /* nested */ */ select 1",
+        "/* x */ drop table t",
+        "(select 1)",
+    ],
+)
+def test_readonly_rejects_everything_else(sql):
+    with pytest.raises(ValueError):
+        ensure_readonly_sql(sql)
+
+
+@pytest.mark.parametrize("sql", ["insert into t values (1)", "/* c */ UPDATE t set x = 1", "-- c\ndelete from t"])
+def test_write_accepts_dml_with_leading_comments(sql):
+    ensure_write_sql(sql, allow_delete=True)
+
+
+@pytest.mark.parametrize("sql", ["select 1", "drop table t", "/* delete */ truncate t", "deleted from t"])
+def test_write_rejects_non_dml(sql):
+    with pytest.raises(ValueError):
+        ensure_write_sql(sql, allow_delete=True)
+
+
+@pytest.mark.parametrize("sql", ["delete from t", "/* c */ delete from t", "-- c\nDELETE from t"])
+def test_delete_requires_full_permission(sql):
+    with pytest.raises(PermissionError):
+        ensure_write_sql(sql, allow_delete=False)
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("/*" + "x" * 300 + "*/ delete from t", "delete"),
+        ("--" + "x" * 300 + "\nselect 1", "select"),
+        (" " * 250 + "selectxyz from t", "selectxyz"),
+        (" " * 250 + "select 1", "select"),
+        ("/*" + "x" * 300, ""),
+        ("insert into t values " + ",".join(["(1)"] * 5000), "insert"),
+    ],
+)
+def test_prefix_beyond_cache_key_length(sql, expected):
+    assert _normalize_sql_prefix(sql) == expected
+
+
+def test_prefix_cache_keys_are_bounded():
+    _cached_sql_prefix.cache_clear()
+    _normalize_sql_prefix("insert into t values " + "(1)," * 10_000 + "(1)")
+    _normalize_sql_prefix("insert into t values " + "(1)," * 10_000 + "(2)")
+    # 两条语句前 256 个字符相同，共用同一缓存项
+    assert _cached_sql_prefix.cache_info().currsize == 1
+
+
+def test_leading_junk_regex_does_not_backtrack():
+    # 大量未闭合的注释/空白组合不能引发回溯爆炸
+    for sql in ("/*" * 20_000, "/* */" * 20_000 + "/*", "-- x\n" * 20_000 + "/*", " \n" * 20_000 + "-"):
+        start = time.perf_counter()
+        assert _normalize_sql_prefix(sql) == ""
+        assert time.perf_counter() - start < 1